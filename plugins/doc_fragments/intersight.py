@@ -49,4 +49,167 @@ options:
     - If C(no), it will not use a proxy, even if one is defined in an environment variable on the target hosts.
     type: bool
     default: yes
+  page_size:
+    description:
+    - Number of results requested per page when a module reads a list of resources.
+    - Pages are retrieved with $top/$skip until all results have been returned.
+    - The Intersight API accepts a maximum of 1000, larger values are reduced to 1000.
+    - If not set, the value of the INTERSIGHT_PAGE_SIZE environment variable is used.
+    type: int
+    default: 1000
+  retries:
+    description:
+    - Number of times an API request is retried after throttling (429) or a transient server error (502, 503, 504).
+    - Connection failures and 502/504 errors are only retried for GET, PATCH, and DELETE requests.
+    - Retries wait using jittered exponential backoff, or the Retry-After time sent by the server.
+    - The number of retries and total time waited are returned in api_retries.
+    - If not set, the value of the INTERSIGHT_RETRIES environment variable is used.
+    type: int
+    default: 5
+  retry_deadline:
+    description:
+    - Maximum number of seconds spent retrying a single API request.
+    - If not set, the value of the INTERSIGHT_RETRY_DEADLINE environment variable is used.
+    type: float
+    default: 300
+  rate_limit:
+    description:
+    - Maximum API requests per second, shared by every module process on this host using the same api_key_id.
+    - Use when many forks run against one Intersight account to hold a steady request rate below the account rate limit.
+    - The limiter state is kept in a locked file in state_dir.
+    - C(0) disables client side rate limiting.
+    - If not set, the value of the INTERSIGHT_RATE_LIMIT environment variable is used.
+    type: float
+    default: 0
+  rate_limit_burst:
+    description:
+    - Number of requests that can be sent back to back before rate_limit applies.
+    - Defaults to rate_limit (one second of requests).
+    - If not set, the value of the INTERSIGHT_RATE_LIMIT_BURST environment variable is used.
+    type: int
+  hedge_percentile:
+    description:
+    - Send a duplicate of a GET that has no response after this percentile (e.g. C(95)) of recent GET latencies, the first successful response is used.
+    - Recent latencies are shared through a locked file in state_dir by all modules using the same api_uri, hedging starts once 20 GETs have been timed.
+    - C(0) disables hedging.
+    - If not set, the value of the INTERSIGHT_HEDGE_PERCENTILE environment variable is used.
+    type: float
+    default: 0
+  hedge_max_ratio:
+    description:
+    - Maximum number of duplicate GETs sent by hedge_percentile per GET, e.g. C(0.05) adds at most 5% extra GETs.
+    - If not set, the value of the INTERSIGHT_HEDGE_MAX_RATIO environment variable is used.
+    type: float
+    default: 0.05
+  circuit_breaker_threshold:
+    description:
+    - Number of consecutive API failures (connection failures and 5xx responses) after which requests to the api_uri fail immediately.
+    - The failure count and circuit state are shared through a locked file in state_dir by all modules using the same api_uri.
+    - After circuit_breaker_cooldown seconds one request at a time is sent as a probe, a successful probe closes the circuit.
+    - C(0) disables the circuit breaker.
+    - If not set, the value of the INTERSIGHT_CIRCUIT_BREAKER_THRESHOLD environment variable is used.
+    type: int
+    default: 0
+  circuit_breaker_cooldown:
+    description:
+    - Seconds requests fail immediately after the circuit breaker opens, before a probe request is sent.
+    - If not set, the value of the INTERSIGHT_CIRCUIT_BREAKER_COOLDOWN environment variable is used.
+    type: float
+    default: 60
+  state_dir:
+    description:
+    - Directory for state files shared by module processes on this host, such as the rate limiter state.
+    - Defaults to an intersight-<uid> directory in the system temporary directory.
+    - The directory is created with mode 0700 if it does not exist, and must be owned by the user running the module with no group or other permissions.
+    - State files must be owned by the user running the module and not writable by others.
+    - If not set, the value of the INTERSIGHT_STATE_DIR environment variable is used.
+    type: path
+  max_concurrency:
+    description:
+    - Maximum number of independent API requests a module sends in parallel.
+    - C(1) sends all requests one after another.
+    - If not set, the value of the INTERSIGHT_MAX_CONCURRENCY environment variable is used.
+    type: int
+    default: 8
+  adaptive_concurrency:
+    description:
+    - Adjust the number of concurrent API requests to the API responses, with max_concurrency as the upper bound.
+    - The limit starts at 2, grows by one after each window of healthy responses, and is halved on 429 or 5xx responses, connection failures, or latency spikes.
+    - Also prefetches pages of multi-page GETs and submits /bulk/Requests chunks concurrently.
+    - The limit over time is returned in api_stats concurrency as [seconds, limit] pairs.
+    - If not set, the value of the INTERSIGHT_ADAPTIVE_CONCURRENCY environment variable is used.
+    type: bool
+    default: false
+  moid_cache_ttl:
+    description:
+    - Seconds that organization, policy, and role name to Moid lookups are shared through a locked file in state_dir.
+    - Lookups are always cached for the duration of a module run, objects deleted or renamed by a module are removed from the cache.
+    - Objects deleted or renamed outside of Ansible may resolve to a stale Moid until the entry expires.
+    - C(0) disables the shared cache.
+    - If not set, the value of the INTERSIGHT_MOID_CACHE_TTL environment variable is used.
+    type: float
+    default: 0
+  state_cache:
+    description:
+    - Cache the current state of policies and profiles in state_dir and only download an object again when its ModTime changed.
+    - Each unchanged object is checked with a Moid and ModTime query instead of a full GET.
+    - State files that cannot be used are ignored and the object is downloaded with a full GET.
+    - Cached objects that were not updated for 7 days are removed, the intersight-state-*.json files in state_dir can also be deleted at any time.
+    - If not set, the value of the INTERSIGHT_STATE_CACHE environment variable is used.
+    type: bool
+    default: false
+  api_stats:
+    description:
+    - Return an api_stats summary of the API calls made by the module.
+    - Each call lists the method, resource path, status, latency in seconds (including retry waits), request and response bytes, retries, and trace id.
+    - shared_gets counts GETs answered by an identical earlier or concurrent GET in the same module run.
+    - hedged counts duplicate GETs sent by the hedge_percentile option.
+    - If not set, the value of the INTERSIGHT_API_STATS environment variable is used.
+    type: bool
+    default: false
+  profile_dir:
+    description:
+    - Directory where a cProfile profile of the module run is written, named <module>-<timestamp>-<pid>.prof.
+    - Profiles can be read with the Python pstats module or tools such as snakeviz.
+    - If not set, the value of the INTERSIGHT_PROFILE_DIR environment variable is used.
+    type: path
+  profile_memory:
+    description:
+    - Also trace memory allocations with tracemalloc and write a <module>-<timestamp>-<pid>.snapshot file to profile_dir.
+    - Load the snapshot with tracemalloc.Snapshot.load() to list the largest allocations.
+    - Memory tracing slows the module run down considerably.
+    - If not set, the value of the INTERSIGHT_PROFILE_MEMORY environment variable is used.
+    type: bool
+    default: false
+  patch_delta:
+    description:
+    - Only send the top-level properties that differ from the current state when an existing resource is updated with PATCH.
+    - ClassId and ObjectType are sent when they are set in the API body, and password related properties (which are never compared) are always sent.
+    - By default the full API body is sent.
+    - If not set, the value of the INTERSIGHT_PATCH_DELTA environment variable is used.
+    type: bool
+    default: false
+  response_cache:
+    description:
+    - Cache GET responses of read-mostly resources in an SQLite database in state_dir shared by all modules using the same api_uri and api_key_id.
+    - Cached resource paths and their TTLs are set by response_cache_ttl, other resources are always read from the API.
+    - Writes made by a module drop the cached responses of that collection, changes made outside of Ansible are seen when the TTL expires.
+    - Cache hits and misses are returned in response_cache.
+    - If not set, the value of the INTERSIGHT_RESPONSE_CACHE environment variable is used.
+    type: bool
+    default: false
+  response_cache_ttl:
+    description:
+    - Seconds responses are cached by collection path (e.g. C(/iam/EndPointRoles)) or first path segment (e.g. C(/hcl)).
+    - Added to the defaults of 3600 for C(/firmware/Distributables), C(/firmware/ServerConfigurationUtilityDistributables), and C(/os/Catalogs),
+      86400 for C(/hcl) and C(/iam/EndPointRoles), and 600 for C(/organization/Organizations).
+    - C(0) disables caching of a path.
+    - If not set, the value of the INTERSIGHT_RESPONSE_CACHE_TTL environment variable (JSON) is used.
+    type: dict
+  response_cache_size:
+    description:
+    - Maximum size in MB of the cached responses, least recently used responses are evicted first.
+    - If not set, the value of the INTERSIGHT_RESPONSE_CACHE_SIZE environment variable is used.
+    type: int
+    default: 64
 '''
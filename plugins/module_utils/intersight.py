@@ -34,15 +34,50 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 from base64 import b64encode
-from email.utils import formatdate
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_tz, mktime_tz
+import copy
+import cProfile
 import re
 import json
 import hashlib
+import os
+import queue
+import random
+import socket
+import ssl
+import stat
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
 from ansible.module_utils.six import iteritems
-from ansible.module_utils.six.moves.urllib.parse import urlparse, urlencode
-from ansible.module_utils.urls import fetch_url
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import urlparse, urlencode, unquote, quote_plus
+from ansible.module_utils.six.moves.urllib.request import getproxies, proxy_bypass
 from ansible.module_utils.basic import env_fallback
 
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 try:
     from cryptography.hazmat.primitives import serialization, hashes
     from cryptography.hazmat.primitives.asymmetric import padding, ec
@@ -51,29 +86,139 @@ try:
 except ImportError:
     HAS_CRYPTOGRAPHY = False
 
+# Largest $top accepted by the Intersight API
+DEFAULT_PAGE_SIZE = 1000
+
 intersight_argument_spec = dict(
     api_private_key=dict(fallback=(env_fallback, ['INTERSIGHT_API_PRIVATE_KEY']), type='path', required=True, no_log=True),
     api_uri=dict(fallback=(env_fallback, ['INTERSIGHT_API_URI']), type='str', default='https://intersight.com/api/v1'),
     api_key_id=dict(fallback=(env_fallback, ['INTERSIGHT_API_KEY_ID']), type='str', required=True),
     validate_certs=dict(type='bool', default=True),
     use_proxy=dict(type='bool', default=True),
+    page_size=dict(fallback=(env_fallback, ['INTERSIGHT_PAGE_SIZE']), type='int', default=DEFAULT_PAGE_SIZE),
+    retries=dict(fallback=(env_fallback, ['INTERSIGHT_RETRIES']), type='int', default=5),
+    retry_deadline=dict(fallback=(env_fallback, ['INTERSIGHT_RETRY_DEADLINE']), type='float', default=300),
+    rate_limit=dict(fallback=(env_fallback, ['INTERSIGHT_RATE_LIMIT']), type='float', default=0),
+    rate_limit_burst=dict(fallback=(env_fallback, ['INTERSIGHT_RATE_LIMIT_BURST']), type='int'),
+    hedge_percentile=dict(fallback=(env_fallback, ['INTERSIGHT_HEDGE_PERCENTILE']), type='float', default=0),
+    hedge_max_ratio=dict(fallback=(env_fallback, ['INTERSIGHT_HEDGE_MAX_RATIO']), type='float', default=0.05),
+    circuit_breaker_threshold=dict(fallback=(env_fallback, ['INTERSIGHT_CIRCUIT_BREAKER_THRESHOLD']), type='int', default=0),
+    circuit_breaker_cooldown=dict(fallback=(env_fallback, ['INTERSIGHT_CIRCUIT_BREAKER_COOLDOWN']), type='float', default=60),
+    state_dir=dict(fallback=(env_fallback, ['INTERSIGHT_STATE_DIR']), type='path'),
+    max_concurrency=dict(fallback=(env_fallback, ['INTERSIGHT_MAX_CONCURRENCY']), type='int', default=8),
+    adaptive_concurrency=dict(fallback=(env_fallback, ['INTERSIGHT_ADAPTIVE_CONCURRENCY']), type='bool', default=False),
+    moid_cache_ttl=dict(fallback=(env_fallback, ['INTERSIGHT_MOID_CACHE_TTL']), type='float', default=0),
+    state_cache=dict(fallback=(env_fallback, ['INTERSIGHT_STATE_CACHE']), type='bool', default=False),
+    api_stats=dict(fallback=(env_fallback, ['INTERSIGHT_API_STATS']), type='bool', default=False),
+    profile_dir=dict(fallback=(env_fallback, ['INTERSIGHT_PROFILE_DIR']), type='path'),
+    profile_memory=dict(fallback=(env_fallback, ['INTERSIGHT_PROFILE_MEMORY']), type='bool', default=False),
+    patch_delta=dict(fallback=(env_fallback, ['INTERSIGHT_PATCH_DELTA']), type='bool', default=False),
+    response_cache=dict(fallback=(env_fallback, ['INTERSIGHT_RESPONSE_CACHE']), type='bool', default=False),
+    response_cache_ttl=dict(fallback=(env_fallback, ['INTERSIGHT_RESPONSE_CACHE_TTL']), type='dict'),
+    response_cache_size=dict(fallback=(env_fallback, ['INTERSIGHT_RESPONSE_CACHE_SIZE']), type='int', default=64),
 )
 
+# Throttling and transient gateway errors worth retrying
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# Statuses where the request was refused without being processed, safe to retry for any verb
+RETRY_ANY_METHOD_STATUS_CODES = (429, 503)
+# Verbs safe to repeat after an ambiguous failure (PATCH bodies in this collection always set absolute values)
+IDEMPOTENT_METHODS = ('GET', 'PATCH', 'DELETE')
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 60.0
+# Maximum number of sub-requests in a single /bulk/Requests call
+BULK_MAX_REQUESTS = 100
+# Adaptive concurrency: starting limit, multiplicative decrease on congestion, and the latency
+# (relative to the moving average of healthy requests) treated as congestion
+ADAPTIVE_CONCURRENCY_START = 2
+ADAPTIVE_CONCURRENCY_DECREASE = 0.5
+ADAPTIVE_LATENCY_FACTOR = 3.0
+ADAPTIVE_LATENCY_WEIGHT = 0.1
+READ_CHUNK_SIZE = 65536
+# Fields always requested by state lookups in addition to the API body keys
+STATE_SELECT_KEYS = ('Moid', 'ModTime')
+# Longest $select added to a state lookup, beyond this the projection is close to the full object anyway
+MAX_SELECT_LENGTH = 2000
+# Longest URL encoded $filter of a Name in (...) query, longer name lists are split into several queries
+MAX_FILTER_LENGTH = 2000
+# Largest GET response (number of Results) kept for identical GETs later in the module run
+SHARED_GET_MAX_RESULTS = 100
+# Hedged GETs: number of recent GET latencies kept, latencies needed before hedging, and the
+# largest number of duplicate GETs that can be saved up
+HEDGE_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_BUDGET = 10.0
+# Seconds GET responses of read-mostly resources are kept by the response_cache option, by
+# collection path or first path segment (response_cache_ttl adds to or overrides these)
+RESPONSE_CACHE_TTLS = {
+    '/firmware/Distributables': 3600,
+    '/firmware/ServerConfigurationUtilityDistributables': 3600,
+    '/hcl': 86400,
+    '/iam/EndPointRoles': 86400,
+    '/organization/Organizations': 600,
+    '/os/Catalogs': 3600,
+}
+# Seconds after which state_cache files that were not updated are removed
+STATE_CACHE_MAX_AGE = 7 * 86400
+# Seconds to wait for another fork holding the response cache write lock
+RESPONSE_CACHE_TIMEOUT = 10.0
+# Type discriminators kept in a delta PATCH body when the API body sets them
+PATCH_REQUIRED_KEYS = ('ClassId', 'ObjectType')
+# Stack frames kept per allocation by profile_memory
+PROFILE_MEMORY_FRAMES = 10
+
+PEM_PRE_BOUNDARY = re.compile(r"\s*-----BEGIN (.*)-----\s+")
+# Password related attribute names (Password, PassWd, Pwd, ...), results are cached per name in EXCLUDED_KEY_CACHE
+PASSWORD_KEY = re.compile(r'P(ass)?w(or)?d')
+EXCLUDED_KEY_CACHE = {}
+
 
 def get_sha256_digest(data):
     """
     Generates a SHA256 digest from a String.
 
-    :param data: data string set by user
+    :param data: data string set by user (or bytes)
     :return: instance of digest object
     """
 
     digest = hashlib.sha256()
-    digest.update(data.encode())
+    digest.update(data if isinstance(data, bytes) else data.encode())
 
     return digest
 
 
+def json_dumps(value):
+    """
+    Encode a request body as compact UTF-8 JSON
+
+    orjson is used when it is installed.  The standard library fallback uses the same separators
+    and unescaped UTF-8, so bodies are the same with either backend apart from the exponent format
+    of very large or small floats.  The Digest header is always computed from the bytes sent.
+
+    :param value: JSON serializable value
+    :return: bytes
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers larger than 64 bits, which the standard library can encode
+            pass
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data):
+    """
+    Decode a JSON response body, with orjson when it is installed
+
+    :param data: bytes or str
+    :return: decoded value
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def prepare_str_to_sign(req_tgt, hdrs):
     """
     Concatenates Intersight headers in preparation to be signed
@@ -82,19 +227,11 @@ def prepare_str_to_sign(req_tgt, hdrs):
     :param hdrs: dict with header keys
     :return: concatenated header authorization string
     """
-    ss = ""
-    ss = ss + "(request-target): " + req_tgt + "\n"
-
-    length = len(hdrs.items())
-
-    i = 0
+    lines = ["(request-target): " + req_tgt]
     for key, value in hdrs.items():
-        ss = ss + key.lower() + ": " + value
-        if i < length - 1:
-            ss = ss + "\n"
-        i += 1
+        lines.append(key.lower() + ": " + value)
 
-    return ss
+    return "\n".join(lines)
 
 
 def get_gmt_date():
@@ -107,45 +244,1080 @@ def get_gmt_date():
     return formatdate(timeval=None, localtime=False, usegmt=True)
 
 
+def get_retry_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retrying a request
+
+    :param attempt: number of retries already made
+    :param retry_after: Retry-After response header value (seconds or HTTP-date)
+    :return: Retry-After delay if the server sent one, else jittered exponential backoff
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            parsed = parsedate_tz(retry_after)
+            if parsed:
+                return max(0.0, mktime_tz(parsed) - time.time())
+    backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+@contextmanager
+def locked_json_state(path):
+    """
+    Exclusive access to a JSON state file shared by every module process (Ansible fork) on this host
+
+    :param path: state file path, created if it does not exist
+    :return: context manager yielding the state dict, changes are written back on exit
+    """
+    flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0)
+    with os.fdopen(os.open(path, flags, 0o600), 'r+') as f:
+        check_state_file(os.fstat(f.fileno()), path)
+        if HAS_FCNTL:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            saved = f.read()
+            try:
+                state = json.loads(saved) if saved else {}
+            except ValueError:
+                # unreadable state (e.g. a process killed mid-write) is reset
+                state = {}
+            yield state
+            updated = json.dumps(state)
+            if updated != saved:
+                f.seek(0)
+                f.truncate()
+                f.write(updated)
+                f.flush()
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def check_state_file(file_stat, path):
+    """
+    Refuse state files that another user could have created or could modify
+
+    :param file_stat: os.stat_result of the state file
+    :param path: state file path used in the error message
+    :raise OSError: the file is not a regular file owned by this user, or is writable by others
+    """
+    if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_uid != os.geteuid() or file_stat.st_mode & 0o022:
+        raise OSError('State file {0} must be a regular file owned by this user and not writable by others'.format(path))
+
+
+def get_state_dir(state_dir=None):
+    """
+    Directory for shared state files, created (mode 0700) if it does not exist
+
+    The default is a directory private to this user in the system temp directory.  The default
+    and a state_dir option directory must both be private to this user, so other local users
+    cannot create or replace the state files.
+
+    :param state_dir: state_dir option, the default directory is used when not set
+    :return: directory path
+    :raise OSError: the directory cannot be created or is not private to this user
+    """
+    path = state_dir or os.path.join(tempfile.gettempdir(), 'intersight-{0}'.format(os.geteuid()))
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    # a state_dir option may be a symlink chosen by the user, the shared default must not be
+    dir_stat = os.stat(path) if state_dir else os.lstat(path)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.geteuid() or dir_stat.st_mode & 0o077:
+        raise OSError('State directory {0} must be a directory owned by this user with mode 0700'.format(path))
+    return path
+
+
+def get_state_path(state_dir, prefix, key, extension='json'):
+    """
+    Path of a shared state file for a key (e.g. an api_key_id) that is safe to use as a file name
+
+    :param state_dir: directory for state files returned by get_state_dir
+    :param prefix: state file type e.g. 'ratelimit'
+    :param key: value the state is shared by
+    :param extension: file name extension
+    :return: state file path
+    :raise OSError: an existing state file is not safe to use (see check_state_file)
+    """
+    name = 'intersight-{0}-{1}.{2}'.format(prefix, hashlib.sha256(key.encode()).hexdigest()[:16], extension)
+    path = os.path.join(state_dir, name)
+    if os.path.lexists(path):
+        check_state_file(os.lstat(path), path)
+    return path
+
+
+def add_state_select(query_params, api_body):
+    """
+    Limit a state lookup to the fields compared with the API body
+
+    Adds a $select of the top-level API body keys plus STATE_SELECT_KEYS unless the query
+    already has a $select or the field list is longer than MAX_SELECT_LENGTH.
+
+    :param query_params: dictionary object with query string parameters
+    :param api_body: dictionary object with intersight data the lookup result is compared with
+    :return: query_params
+    """
+    if isinstance(api_body, dict) and api_body and '$select' not in query_params:
+        keys = list(api_body) + [key for key in STATE_SELECT_KEYS if key not in api_body]
+        select_str = ','.join(keys)
+        if len(select_str) <= MAX_SELECT_LENGTH:
+            query_params['$select'] = select_str
+    return query_params
+
+
+def get_name_filters(names, query_filter=None):
+    """
+    $filter values matching a list of object names, split so each stays under MAX_FILTER_LENGTH
+    when URL encoded
+
+    :param names: intersight object names
+    :param query_filter: additional $filter clause e.g. "Type eq 'IMC'"
+    :return: generator of (names, $filter) tuples
+    """
+    suffix = ')'
+    if query_filter:
+        suffix += ' and (' + query_filter + ')'
+    empty_length = len(quote_plus('Name in (' + suffix))
+    batch = []
+    quoted_names = []
+    length = empty_length
+    for name in names:
+        quoted = "'" + name.replace("'", "''") + "'"
+        quoted_length = len(quote_plus(quoted))
+        if batch and length + len(quote_plus(',')) + quoted_length > MAX_FILTER_LENGTH:
+            yield batch, 'Name in (' + ','.join(quoted_names) + suffix
+            batch = []
+            quoted_names = []
+            length = empty_length
+        if batch:
+            length += len(quote_plus(','))
+        batch.append(name)
+        quoted_names.append(quoted)
+        length += quoted_length
+    if batch:
+        yield batch, 'Name in (' + ','.join(quoted_names) + suffix
+
+
+def is_excluded_key(key):
+    """
+    Password related attributes are write-only and never compared
+
+    :param key: attribute name
+    :return: True if the attribute is not compared
+    """
+    excluded = EXCLUDED_KEY_CACHE.get(key)
+    if excluded is None:
+        excluded = EXCLUDED_KEY_CACHE[key] = PASSWORD_KEY.search(key) is not None
+    return excluded
+
+
+def format_value_path(path):
+    """
+    JSON path string e.g. '$.BootDevices[1].Slot' from a (parent, key) linked path
+    """
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append('[%d]' % key if isinstance(key, int) else '.' + key)
+    return '$' + ''.join(reversed(keys))
+
+
+def iter_value_diffs(expected, actual):
+    """
+    Generate the differences between expected and actual values
+
+    Expected dicts match when every key that is present in actual (other than password related
+    keys) has a matching value, extra keys in actual are ignored.  A dict with keys to compare never
+    matches a value that is not a dict.  Lists must have the same length and matching elements in
+    the same order.  Other values must be equal.
+
+    :param expected: value built from module parameters
+    :param actual: value returned by the API
+    :return: generator of (JSON path, expected value, actual value) tuples
+    """
+    # depth first walk with an explicit stack, paths are (parent, key) tuples formatted only for differences
+    stack = [(expected, actual, None)]
+    while stack:
+        expected, actual, path = stack.pop()
+        if isinstance(expected, dict):
+            if not isinstance(actual, dict):
+                if not all(is_excluded_key(key) for key in expected):
+                    yield format_value_path(path), expected, actual
+                continue
+            nested = []
+            for key, value in expected.items():
+                if key not in actual or is_excluded_key(key):
+                    # do not compare any password related attributes or attributes that are not in the actual resource
+                    continue
+                actual_value = actual[key]
+                if isinstance(value, (dict, list)):
+                    nested.append((value, actual_value, (path, key)))
+                elif value != actual_value:
+                    yield format_value_path((path, key)), value, actual_value
+            stack.extend(reversed(nested))
+        elif isinstance(expected, list):
+            if not isinstance(actual, list) or len(expected) != len(actual):
+                yield format_value_path(path), expected, actual
+                continue
+            nested = []
+            for index, value in enumerate(expected):
+                actual_value = actual[index]
+                if isinstance(value, (dict, list)):
+                    nested.append((value, actual_value, (path, index)))
+                elif value != actual_value:
+                    yield format_value_path((path, index)), value, actual_value
+            stack.extend(reversed(nested))
+        elif expected != actual:
+            yield format_value_path(path), expected, actual
+
+
+def get_value_diffs(expected, actual):
+    """
+    JSON paths where actual differs from expected (see iter_value_diffs)
+
+    :return: list of JSON path strings e.g. ['$.Timezone', '$.BootDevices[1].Slot']
+    """
+    return [path for path, dummy, dummy in iter_value_diffs(expected, actual)]
+
+
 def compare_lists(expected_list, actual_list):
-    if len(expected_list) != len(actual_list):
-        # mismatch if list lengths aren't equal
+    return compare_values(expected_list, actual_list)
+
+
+def compare_values(expected, actual):
+    """
+    Check if the actual value matches the expected value (see iter_value_diffs)
+
+    :return: True if there are no differences, stops at the first one
+    """
+    for dummy in iter_value_diffs(expected, actual):
         return False
-    for expected, actual in zip(expected_list, actual_list):
-        # if compare_values returns False, stop the loop and return
-        if not compare_values(expected, actual):
-            return False
-    # loop complete with all items matching
     return True
 
 
-def compare_values(expected, actual):
-    try:
-        if isinstance(expected, list) and isinstance(actual, list):
-            return compare_lists(expected, actual)
-        for (key, value) in iteritems(expected):
-            if re.search(r'P(ass)?w(or)?d', key) or key not in actual:
-                # do not compare any password related attributes or attributes that are not in the actual resource
-                continue
-            if not compare_values(value, actual[key]):
+def get_changed_keys(expected, actual):
+    """
+    Top-level keys of expected whose values differ from actual (see iter_value_diffs)
+
+    :param expected: dict built from module parameters
+    :param actual: dict returned by the API
+    :return: set of keys
+    """
+    return set(
+        key for key, value in expected.items()
+        if key in actual and not is_excluded_key(key) and not compare_values(value, actual[key])
+    )
+
+
+def get_patch_body(body, changed_keys):
+    """
+    Minimal PATCH body with the changed top-level keys
+
+    Keys in PATCH_REQUIRED_KEYS and password related keys (which are never compared) are always
+    kept.  Nested values are sent whole so complex types are not partially updated.
+
+    :param body: full API body
+    :param changed_keys: keys to update, e.g. from get_changed_keys
+    :return: dict
+    """
+    return dict(
+        (key, value) for key, value in body.items()
+        if key in changed_keys or key in PATCH_REQUIRED_KEYS or is_excluded_key(key)
+    )
+
+
+def get_collection_path(resource_path):
+    """
+    Collection a resource path belongs to, e.g. '/ntp/Policies' for '/ntp/Policies/{moid}/Profiles'
+    """
+    return '/'.join(resource_path.split('/')[:3])
+
+
+def get_page_queries(query_params, page_size):
+    """
+    Query parameters of each page of a $top/$skip paginated GET
+
+    A $top in query_params limits the total number of results and a $skip sets the starting offset.
+
+    :param query_params: dictionary object with query string parameters as key/value pairs
+    :param page_size: number of results requested per page
+    :return: generator of (query_params, $top) tuples, one per page
+    """
+    query_params = dict(query_params or {})
+    remaining = query_params.pop('$top', None)
+    if remaining is not None:
+        remaining = int(remaining)
+    skip = int(query_params.pop('$skip', 0) or 0)
+    while remaining is None or remaining > 0:
+        top = page_size if remaining is None else min(page_size, remaining)
+        page = dict(query_params)
+        page['$top'] = top
+        page['$skip'] = skip
+        yield page, top
+        skip += top
+        if remaining is not None:
+            remaining -= top
+
+
+def is_last_page(response, top):
+    """
+    True when a page response has fewer than $top results, or is not a Results list (e.g. $count)
+    """
+    results = response.get('Results')
+    return not isinstance(results, list) or len(results) < top
+
+
+def remove_excluded_keys(value):
+    """
+    Copy of a value without password related attributes, for values shown in module output
+    """
+    if isinstance(value, dict):
+        return dict((key, remove_excluded_keys(item)) for key, item in value.items() if not is_excluded_key(key))
+    if isinstance(value, list):
+        return [remove_excluded_keys(item) for item in value]
+    return value
+
+
+def read_body(response):
+    """
+    Read an HTTP response body, decoding gzip/deflate content encoding as the data streams in
+
+    :param response: http_client.HTTPResponse object
+    :return: (decoded body bytes, number of body bytes received on the wire)
+    """
+    encoding = (response.getheader('Content-Encoding') or '').strip().lower()
+    decoder = None
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        # detects both gzip and zlib wrapped streams
+        decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    chunks = []
+    wire_bytes = 0
+    while True:
+        chunk = response.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        wire_bytes += len(chunk)
+        if decoder is None:
+            chunks.append(chunk)
+            continue
+        try:
+            chunks.append(decoder.decompress(chunk))
+        except zlib.error:
+            if encoding != 'deflate' or wire_bytes != len(chunk):
+                raise
+            # some servers send raw deflate data without the zlib wrapper
+            decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            chunks.append(decoder.decompress(chunk))
+    if decoder is not None:
+        chunks.append(decoder.flush())
+    return b''.join(chunks), wire_bytes
+
+
+class IntersightResponse():
+    """
+    HTTP response read in full from a pooled connection.
+
+    Exposes the read() method callers of fetch_url responses expect.
+    """
+
+    def __init__(self, status, reason, headers, data, wire_bytes=None):
+        self.code = status
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+        self.wire_bytes = len(data) if wire_bytes is None else wire_bytes
+
+    def read(self):
+        return self.data
+
+
+class IntersightConnectionPool():
+    """
+    Keep-alive HTTP(S) connections to the api_uri host.
+
+    Connections are returned to the pool after each response has been read so every call made
+    during a module run reuses an established TCP+TLS session instead of repeating the handshake.
+    """
+
+    def __init__(self, api_uri, validate_certs=True, use_proxy=True, timeout=10, maxsize=10):
+        uri = urlparse(api_uri)
+        self.scheme = uri.scheme
+        self.host = uri.hostname
+        if self.scheme not in ('http', 'https') or not self.host:
+            raise ValueError('api_uri must be an absolute http(s) URI: {0}'.format(api_uri))
+        # raises ValueError for a port that is not a number or out of range
+        self.port = uri.port or (443 if self.scheme == 'https' else 80)
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.idle = []
+        self.lock = threading.Lock()
+        self.ssl_context = None
+        if self.scheme == 'https':
+            self.ssl_context = ssl.create_default_context()
+            if not validate_certs:
+                self.ssl_context.check_hostname = False
+                self.ssl_context.verify_mode = ssl.CERT_NONE
+        self.proxy = None
+        if use_proxy and self.host:
+            proxy = getproxies().get(self.scheme)
+            if proxy and not proxy_bypass(self.host):
+                self.proxy = urlparse(proxy if '://' in proxy else 'http://' + proxy)
+                self.proxy_port = self.proxy.port or 80
+
+    def new_connection(self):
+        if self.proxy:
+            proxy_port = self.proxy_port
+            if self.scheme == 'http':
+                return http_client.HTTPConnection(self.proxy.hostname, proxy_port, timeout=self.timeout)
+            # CONNECT tunnel through the proxy, TLS is negotiated end to end with the api_uri host
+            tunnel_headers = {}
+            if self.proxy.username:
+                credentials = '{0}:{1}'.format(unquote(self.proxy.username), unquote(self.proxy.password or ''))
+                tunnel_headers['Proxy-Authorization'] = 'Basic ' + b64encode(credentials.encode()).decode('ascii')
+            conn = http_client.HTTPSConnection(self.proxy.hostname, proxy_port, timeout=self.timeout, context=self.ssl_context)
+            conn.set_tunnel(self.host, self.port, headers=tunnel_headers)
+            return conn
+        if self.scheme == 'https':
+            return http_client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+        return http_client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def get_connection(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(), True
+        return self.new_connection(), False
+
+    def put_connection(self, conn):
+        with self.lock:
+            if len(self.idle) < self.maxsize:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+    def urlopen(self, method, path, body=None, headers=None):
+        """
+        Send a request on a pooled connection and read the full response
+
+        :param method: HTTP verb
+        :param path: request target path including any query string
+        :param body: request body bytes
+        :param headers: dict of request headers
+        :return: IntersightResponse object
+        """
+        if self.proxy and self.scheme == 'http':
+            # plain HTTP proxies expect the absolute URI as the request target
+            path = '{0}://{1}:{2}{3}'.format(self.scheme, self.host, self.port, path)
+        while True:
+            conn, reused = self.get_connection()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data, wire_bytes = read_body(resp)
+            except (http_client.RemoteDisconnected, ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                conn.close()
+                if reused:
+                    # the server closed an idle keep-alive connection, retry on a fresh connection
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self.put_connection(conn)
+            return IntersightResponse(resp.status, resp.reason, resp.getheaders(), data, wire_bytes)
+
+    def request(self, url, method, data=None, headers=None):
+        """
+        fetch_url compatible wrapper around urlopen
+
+        Connection failures are returned with a -1 status.  Requests that can never succeed (e.g. a
+        URL with control characters) raise ValueError instead, so they are not retried.
+
+        :return: (response, info) tuple where info has the lowercased response headers, status, msg, and body sizes
+        :raise ValueError: the request URL is invalid
+        """
+        info = dict(url=url, status=-1)
+        target = urlparse(url)
+        path = target.path + ('?' + target.query if target.query else '')
+        try:
+            response = self.urlopen(method, path, body=data, headers=headers)
+        except http_client.BadStatusLine as e:
+            info['msg'] = 'Connection failure: connection was closed before a valid response was received: %s' % str(e)
+            return None, info
+        except http_client.InvalidURL as e:
+            raise ValueError('Invalid request URL %s: %s' % (url, str(e)))
+        except (socket.error, ssl.SSLError, http_client.HTTPException, zlib.error) as e:
+            info['msg'] = 'Request failed: %s' % str(e)
+            return None, info
+        for name, value in response.headers:
+            name = name.lower()
+            if name in info:
+                info[name] = ', '.join((info[name], value))
+            else:
+                info[name] = value
+        info.update(
+            status=response.status,
+            msg='OK (%s bytes)' % len(response.data),
+            wire_bytes=response.wire_bytes,
+            decoded_bytes=len(response.data),
+        )
+        if response.status >= 400:
+            info.update(msg='HTTP Error %s: %s' % (response.status, response.reason), body=response.data)
+        return response, info
+
+
+class RateLimiter():
+    """
+    Token bucket shared by every module process on this host that uses the same api_key_id.
+
+    Each request takes a token as soon as it asks for one.  When the bucket is empty the token is
+    borrowed from the future and the caller sleeps until it would have been refilled, so concurrent
+    forks queue behind each other at a steady rate instead of bursting into the API rate limit.
+    """
+
+    def __init__(self, rate, burst, path):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.path = path
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait for a request token
+
+        :return: seconds waited
+        """
+        with self.lock:
+            with locked_json_state(self.path) as state:
+                now = time.time()
+                elapsed = max(0.0, now - state.get('updated', now))
+                tokens = min(self.burst, state.get('tokens', self.burst) + elapsed * self.rate) - 1
+                state['tokens'] = tokens
+                state['updated'] = now
+        delay = -tokens / self.rate if tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class CircuitBreaker():
+    """
+    Circuit breaker shared by every module process on this host that uses the same api_uri.
+
+    After threshold consecutive failures (connection failures and 5xx responses) the circuit
+    opens and requests fail immediately for cooldown seconds.  The circuit is then half-open: one
+    process at a time sends a probe request, a successful probe closes the circuit and a failed
+    probe opens it for another cooldown.  Any other response (including 4xx and 429) resets the
+    failure count.
+    """
+
+    def __init__(self, threshold, cooldown, path):
+        self.threshold = threshold
+        self.cooldown = float(cooldown)
+        self.path = path
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check if a request may be sent
+
+        :return: None if the request may be sent, otherwise seconds until the circuit is half-open
+        """
+        with self.lock:
+            with locked_json_state(self.path) as state:
+                opened = state.get('opened')
+                if opened is None:
+                    return None
+                now = time.time()
+                if now < opened + self.cooldown:
+                    return opened + self.cooldown - now
+                # half-open, only one probe in flight (a probe lost with its process expires after a cooldown)
+                if now < state.get('probe', 0):
+                    return state['probe'] - now
+                state['probe'] = now + self.cooldown
+                return None
+
+    def record(self, status):
+        """
+        Count the outcome of a request
+
+        :param status: HTTP status of the response, -1 for a connection failure
+        """
+        failed = status == -1 or status >= 500
+        with self.lock:
+            with locked_json_state(self.path) as state:
+                if not failed:
+                    if state:
+                        state.clear()
+                    return
+                state['failures'] = state.get('failures', 0) + 1
+                if state.get('opened') is not None or state['failures'] >= self.threshold:
+                    state['opened'] = time.time()
+                    state.pop('probe', None)
+
+
+class RequestHedger():
+    """
+    Delay after which a GET without a response is duplicated (hedged), from a percentile of
+    recent GET latencies.
+
+    The last HEDGE_SAMPLES GET latencies and a budget of duplicate GETs are shared through a locked
+    state file by every module process on this host that uses the same api_uri.  Each GET adds
+    max_ratio to the budget and each duplicate takes one, so hedging adds at most max_ratio extra
+    GETs per GET.  When the state file cannot be used, latencies are only kept in memory and no
+    duplicate GETs are sent.
+    """
+
+    def __init__(self, percentile, max_ratio, path):
+        self.percentile = float(percentile)
+        self.max_ratio = float(max_ratio)
+        self.path = path
+        self.lock = threading.Lock()
+        # loaded from the state file by the first get_delay
+        self.latencies = None
+
+    def get_delay(self):
+        """
+        Seconds to wait for a response before sending a duplicate GET
+
+        :return: delay or None until HEDGE_MIN_SAMPLES latencies are known
+        """
+        with self.lock:
+            if self.latencies is None:
+                try:
+                    with locked_json_state(self.path) as state:
+                        self.latencies = state.get('latencies', [])
+                except OSError:
+                    self.latencies = []
+            latencies = sorted(self.latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile / 100.0))]
+
+    def add_latency(self, latency, hedge=False):
+        """
+        Record the latency of a completed GET
+
+        :param latency: seconds from sending the request to reading the response
+        :param hedge: True for a duplicate GET, which does not add to the budget
+        """
+        with self.lock:
+            try:
+                with locked_json_state(self.path) as state:
+                    latencies = state.get('latencies', [])
+                    latencies.append(round(latency, 6))
+                    state['latencies'] = self.latencies = latencies[-HEDGE_SAMPLES:]
+                    if not hedge:
+                        state['budget'] = min(HEDGE_MAX_BUDGET, state.get('budget', 0.0) + self.max_ratio)
+            except OSError:
+                self.latencies = ((self.latencies or []) + [round(latency, 6)])[-HEDGE_SAMPLES:]
+
+    def take(self):
+        """
+        Take a duplicate GET from the budget
+
+        :return: True if a duplicate GET may be sent
+        """
+        with self.lock:
+            try:
+                with locked_json_state(self.path) as state:
+                    if state.get('budget', 0.0) < 1:
+                        return False
+                    state['budget'] -= 1
+                    return True
+            except OSError:
                 return False
-        # loop complete with all items matching
-        return True
-    except (AttributeError, TypeError):
-        # if expected and actual != expected:
-        if actual != expected:
-            return False
-        return True
+
+
+class AdaptiveConcurrency():
+    """
+    Limit on the number of API requests in flight, adjusted with additive increase and
+    multiplicative decrease (AIMD).
+
+    Every healthy response raises the limit by 1/limit, i.e. by one after a full window of
+    requests.  A 429, 5xx, connection failure, or a latency over ADAPTIVE_LATENCY_FACTOR times the
+    moving average of healthy requests halves it.  Requests sent before the last decrease do not
+    decrease it again, so one burst of throttled responses costs a single cut.
+    """
+
+    def __init__(self, maximum, initial=ADAPTIVE_CONCURRENCY_START):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(self.maximum, max(1, initial)))
+        self.in_flight = 0
+        self.latency = None
+        self.decreased = 0.0
+        self.start = time.time()
+        # [seconds since start, limit] whenever the whole number limit changes
+        self.history = [[0.0, int(self.limit)]]
+        self.condition = threading.Condition()
+
+    def acquire(self, blocking=True):
+        """
+        Wait for a request slot
+
+        :param blocking: False to return None instead of waiting when no slot is free
+        :return: time the slot was acquired, passed to release
+        """
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                if not blocking:
+                    return None
+                self.condition.wait()
+            self.in_flight += 1
+        return time.time()
+
+    def cancel(self):
+        """
+        Free a request slot that was not used, without adjusting the limit
+        """
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def release(self, started, status, latency):
+        """
+        Free a request slot and adjust the limit
+
+        :param started: value returned by acquire
+        :param status: HTTP status of the response, -1 for a connection failure
+        :param latency: seconds the request took
+        """
+        with self.condition:
+            self.in_flight -= 1
+            limit = int(self.limit)
+            congested = status == -1 or status == 429 or status >= 500
+            if not congested and self.latency is not None:
+                congested = latency > ADAPTIVE_LATENCY_FACTOR * self.latency
+            if congested:
+                if started >= self.decreased:
+                    self.limit = max(1.0, self.limit * ADAPTIVE_CONCURRENCY_DECREASE)
+                    self.decreased = time.time()
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency += ADAPTIVE_LATENCY_WEIGHT * (latency - self.latency)
+            if int(self.limit) != limit:
+                self.history.append([round(time.time() - self.start, 3), int(self.limit)])
+            self.condition.notify_all()
+
+    def get_limit(self):
+        with self.condition:
+            return int(self.limit)
+
+
+class MoidCache():
+    """
+    Name to Moid resolutions keyed by (api_uri, resource_path, name, organization, filter).
+
+    Entries are always kept in memory for the module run.  With a ttl and a path they are also
+    shared through a locked state file, so forks and later tasks resolve the same organizations
+    and policies without another API call until the entry expires.  State file errors (e.g. an
+    unreadable file) are misses and do not stop the in-memory cache.
+    """
+
+    def __init__(self, api_uri, ttl=0, path=None):
+        self.api_uri = api_uri
+        self.ttl = float(ttl or 0)
+        self.path = path if self.ttl > 0 else None
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def key(self, resource_path, name, organization=None, query_filter=None):
+        # JSON text so the same key can be used in the state file
+        return json.dumps([self.api_uri, resource_path, name, organization, query_filter])
+
+    def get(self, resource_path, name, organization=None, query_filter=None):
+        """
+        Cached Moid for a name
+
+        :return: Moid or None when not cached (or expired)
+        """
+        key = self.key(resource_path, name, organization, query_filter)
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+            if not self.path:
+                return None
+            try:
+                with locked_json_state(self.path) as state:
+                    entry = state.get(key)
+            except OSError:
+                return None
+            if not entry or entry[1] <= time.time():
+                return None
+            self.entries[key] = entry[0]
+            return entry[0]
+
+    def set(self, resource_path, name, moid, organization=None, query_filter=None):
+        key = self.key(resource_path, name, organization, query_filter)
+        with self.lock:
+            self.entries[key] = moid
+            if not self.path:
+                return
+            try:
+                with locked_json_state(self.path) as state:
+                    now = time.time()
+                    for stale in [k for k, entry in iteritems(state) if entry[1] <= now]:
+                        del state[stale]
+                    state[key] = [moid, now + self.ttl]
+            except OSError:
+                pass
+
+    def invalidate(self, resource_path, moid=None, name=None):
+        """
+        Drop entries for an object that was deleted or renamed
+
+        :param resource_path: intersight resource path of the object e.g. '/ntp/Policies'
+        :param moid: drop entries resolving to this Moid
+        :param name: drop entries for this name
+        """
+        def matches(key, cached_moid):
+            api_uri, path, cached_name = json.loads(key)[:3]
+            return api_uri == self.api_uri and path == resource_path and (
+                (moid is not None and cached_moid == moid) or (name is not None and cached_name == name))
+
+        with self.lock:
+            for key in [k for k, cached_moid in iteritems(self.entries) if matches(k, cached_moid)]:
+                del self.entries[key]
+            if not self.path:
+                return
+            try:
+                with locked_json_state(self.path) as state:
+                    for key in [k for k, entry in iteritems(state) if matches(k, entry[0])]:
+                        del state[key]
+            except OSError:
+                pass
+
+
+class ResponseCache():
+    """
+    GET responses of read-mostly resources (e.g. firmware distributables and endpoint roles) kept
+    in an SQLite database shared by every module process on this host using the same api_uri and
+    api_key_id.
+
+    Responses expire after the TTL of their resource path, writes to a collection drop its cached
+    responses, and the least recently used responses are evicted when the cache exceeds max_bytes.
+    The database is in WAL mode so forks keep reading while one of them writes, and every process
+    opens its own connection.  Cache errors (e.g. a locked or unreadable database) are misses.
+    """
+
+    def __init__(self, path, ttls, max_bytes):
+        self.path = path
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.db = None
+        self.pid = None
+        # connections inherited from a parent process, kept open because closing them would
+        # release the SQLite file locks of this process
+        self.inherited = []
+        self.lock = threading.Lock()
+
+    def get_ttl(self, resource_path):
+        """
+        Seconds responses of a resource path are cached, 0 if they are not cached
+        """
+        collection = get_collection_path(resource_path)
+        ttl = self.ttls.get(collection)
+        if ttl is None:
+            ttl = self.ttls.get('/' + collection.lstrip('/').split('/')[0])
+        return float(ttl or 0)
+
+    def connect(self):
+        # connections are not usable in a forked child
+        if self.db is None or self.pid != os.getpid():
+            if self.db is not None:
+                self.inherited.append(self.db)
+            flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0)
+            fd = os.open(self.path, flags, 0o600)
+            try:
+                check_state_file(os.fstat(fd), self.path)
+            finally:
+                os.close(fd)
+            for suffix in ('-wal', '-shm'):
+                if os.path.lexists(self.path + suffix):
+                    check_state_file(os.lstat(self.path + suffix), self.path + suffix)
+            db = sqlite3.connect(self.path, timeout=RESPONSE_CACHE_TIMEOUT, isolation_level=None, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, collection TEXT, response BLOB, size INTEGER, expires REAL, used REAL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS responses_collection ON responses (collection)')
+            self.db = db
+            self.pid = os.getpid()
+        return self.db
+
+    def get(self, key):
+        """
+        Cached response for a request key
+
+        :return: json http response object or None when not cached (or expired)
+        """
+        with self.lock:
+            try:
+                db = self.connect()
+                now = time.time()
+                row = db.execute('SELECT response FROM responses WHERE key = ? AND expires > ?', (key, now)).fetchone()
+                if row is not None:
+                    db.execute('UPDATE responses SET used = ? WHERE key = ?', (now, key))
+            except (sqlite3.Error, OSError):
+                row = None
+        if row is None:
+            return None
+        return json_loads(row[0])
+
+    def set(self, key, resource_path, response, ttl):
+        data = json_dumps(response)
+        if len(data) > self.max_bytes:
+            return
+        with self.lock:
+            try:
+                db = self.connect()
+                with db:
+                    db.execute('BEGIN IMMEDIATE')
+                    now = time.time()
+                    db.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+                    db.execute(
+                        'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                        (key, get_collection_path(resource_path), data, len(data), now + ttl, now),
+                    )
+                    # evict least recently used responses until the cache fits in max_bytes
+                    total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+                    if total > self.max_bytes:
+                        for old_key, size in db.execute('SELECT key, size FROM responses ORDER BY used').fetchall():
+                            if total <= self.max_bytes:
+                                break
+                            db.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                            total -= size
+            except (sqlite3.Error, OSError):
+                pass
+
+    def invalidate(self, resource_path):
+        """
+        Drop cached responses for the collection a write was made to, e.g. '/iam/EndPointRoles'
+        """
+        with self.lock:
+            try:
+                self.connect().execute('DELETE FROM responses WHERE collection = ?', (get_collection_path(resource_path),))
+            except (sqlite3.Error, OSError):
+                pass
+
+
+class PrivateKeySigner():
+    """
+    Signs strings with a PEM formatted private key.
+
+    The key is parsed and classified once so repeated requests only pay for the signature itself.
+    """
+
+    def __init__(self, private_key):
+        # Python SDK code: Verify PEM Pre-Encapsulation Boundary
+        m = PEM_PRE_BOUNDARY.match(private_key)
+        if not m:
+            raise ValueError("Not a valid PEM pre boundary")
+        pem_header = m.group(1)
+        self.key = serialization.load_pem_private_key(private_key.encode(), None, default_backend())
+        if pem_header == 'RSA PRIVATE KEY':
+            self.algorithm = 'rsa-sha256'
+            self.sign_args = (padding.PKCS1v15(), hashes.SHA256())
+        elif pem_header == 'EC PRIVATE KEY':
+            self.algorithm = 'hs2019'
+            self.sign_args = (ec.ECDSA(hashes.SHA256()),)
+        else:
+            raise Exception("Unsupported key: {0}".format(pem_header))
+
+    def sign(self, data):
+        """
+        Signs a String with the loaded private key
+
+        :param data: string to be signed & hashed
+        :return: base64 encoded signature
+        """
+        return b64encode(self.key.sign(data.encode(), *self.sign_args))
+
+
+class RequestSigner():
+    """
+    Builds the signed headers of Intersight API requests.
+
+    The host, keyId, algorithm, and signed header list do not change during a module run, so the
+    string to sign and the Authorization header are prepared once as templates and only the
+    request-target, Date, and Digest are filled in per request.
+    """
+
+    def __init__(self, key_id, signer, host):
+        self.signer = signer
+        self.host = host
+        self.sign_suffix = "\nhost: " + host + "\ndate: "
+        self.auth_prefix = (
+            'Signature keyId="' + key_id + '",algorithm="' + signer.algorithm + '",'
+            'headers="(request-target) host date digest",signature="'
+        )
+        self.empty_digest = "SHA-256=" + b64encode(hashlib.sha256(b"").digest()).decode('ascii')
+
+    def headers(self, request_target, data=None):
+        """
+        Host, Date, Digest, and Authorization headers for a request
+
+        :param request_target: lowercase http method plus path and query e.g. 'get /api/v1/ntp/Policies'
+        :param data: request body bytes
+        :return: dict of headers
+        """
+        date = get_gmt_date()
+        if data:
+            digest = "SHA-256=" + b64encode(hashlib.sha256(data).digest()).decode('ascii')
+        else:
+            digest = self.empty_digest
+        string_to_sign = "(request-target): " + request_target + self.sign_suffix + date + "\ndigest: " + digest
+        signature = self.signer.sign(string_to_sign).decode('ascii')
+        return {
+            'Host': self.host,
+            'Date': date,
+            'Digest': digest,
+            'Authorization': self.auth_prefix + signature + '"',
+        }
 
 
 class IntersightModule():
 
     def __init__(self, module):
         self.module = module
-        self.result = dict(changed=False)
+        self.profiler = None
+        if self.module.params.get('profile_dir'):
+            self.start_profile()
+        self.result = dict(
+            changed=False,
+            api_retries=dict(count=0, wait_time=0.0),
+            api_transfer=dict(wire_bytes=0, decoded_bytes=0),
+        )
+        if self.module.params.get('api_stats'):
+            self.result['api_stats'] = dict(
+                calls=0,
+                latency=0.0,
+                request_bytes=0,
+                response_bytes=0,
+                shared_gets=0,
+                hedged=0,
+                requests=[],
+            )
         if not HAS_CRYPTOGRAPHY:
             self.module.fail_json(msg='cryptography is required for this module')
         self.host = self.module.params['api_uri']
+        # host and base path (e.g. /api/v1) used in every signed request
+        api_uri = urlparse(self.host)
+        self.target_host = api_uri.netloc
+        self.target_path = api_uri.path
         self.public_key = self.module.params['api_key_id']
         try:
             with open(self.module.params['api_private_key'], 'r') as f:
@@ -153,7 +1325,162 @@ class IntersightModule():
         except (FileNotFoundError, OSError):
             self.private_key = self.module.params['api_private_key']
         self.digest_algorithm = ''
+        self.signer = None
+        self.request_signer = None
+        # GET responses shared by identical GETs during this module run (see shared_get)
+        self.shared_gets = {}
         self.response_list = []
+        # guards shared state updated by concurrent requests (see call_many)
+        self.lock = threading.Lock()
+        # shared state file directory, created and checked on first use (see get_state_dir)
+        self.state_dir = None
+        self.state_cache_pruned = False
+        self.rate_limiter = None
+        if self.module.params.get('rate_limit'):
+            self.rate_limiter = RateLimiter(
+                rate=self.module.params['rate_limit'],
+                burst=self.module.params.get('rate_limit_burst'),
+                path=self.get_state_path('ratelimit', self.public_key),
+            )
+        self.hedger = None
+        if self.module.params.get('hedge_percentile'):
+            self.hedger = RequestHedger(
+                percentile=self.module.params['hedge_percentile'],
+                max_ratio=self.module.params['hedge_max_ratio'],
+                path=self.get_state_path('hedge', self.host),
+            )
+        self.circuit_breaker = None
+        if self.module.params.get('circuit_breaker_threshold'):
+            self.circuit_breaker = CircuitBreaker(
+                threshold=self.module.params['circuit_breaker_threshold'],
+                cooldown=self.module.params['circuit_breaker_cooldown'],
+                path=self.get_state_path('circuit', self.host),
+            )
+        # name to Moid resolutions, optionally shared on disk by every module using this api_uri and api_key_id
+        moid_cache_path = None
+        if self.module.params.get('moid_cache_ttl'):
+            moid_cache_path = self.get_state_path('moids', self.host + ' ' + self.public_key)
+        self.moid_cache = MoidCache(self.host, ttl=self.module.params.get('moid_cache_ttl'), path=moid_cache_path)
+        # GET responses of read-mostly resources shared on disk by every module using this api_uri and api_key_id
+        self.response_cache = None
+        if self.module.params.get('response_cache'):
+            if not HAS_SQLITE3:
+                self.module.fail_json(msg='sqlite3 is required for the response_cache option')
+            ttls = dict(RESPONSE_CACHE_TTLS)
+            ttls.update(self.module.params.get('response_cache_ttl') or {})
+            self.response_cache = ResponseCache(
+                path=self.get_state_path('responses', self.host + ' ' + self.public_key, 'sqlite'),
+                ttls=ttls,
+                max_bytes=self.module.params['response_cache_size'] * 1024 * 1024,
+            )
+            self.result['response_cache'] = dict(hits=0, misses=0)
+        # requests in flight adjusted to API responses, max_concurrency is the upper bound
+        self.concurrency = None
+        if self.module.params.get('adaptive_concurrency'):
+            self.concurrency = AdaptiveConcurrency(self.module.params.get('max_concurrency') or 1)
+            if 'api_stats' in self.result:
+                self.result['api_stats']['concurrency'] = self.concurrency.history
+        # keep-alive connections shared by all API calls made during this module run
+        try:
+            self.connection_pool = IntersightConnectionPool(
+                self.host,
+                validate_certs=self.module.params['validate_certs'],
+                use_proxy=self.module.params['use_proxy'],
+                maxsize=max(1, self.module.params.get('max_concurrency') or 1),
+            )
+        except ValueError as e:
+            self.module.fail_json(msg='Invalid api_uri: %s' % str(e))
+
+    def get_state_dir(self):
+        """
+        Shared state file directory, created and checked by the first call (see get_state_dir)
+
+        :raise OSError: the directory cannot be used
+        """
+        if self.state_dir is None:
+            self.state_dir = get_state_dir(self.module.params.get('state_dir'))
+        return self.state_dir
+
+    def get_state_path(self, prefix, key, extension='json'):
+        """
+        Path of a shared state file in the state_dir option directory (see get_state_path)
+        """
+        try:
+            return get_state_path(self.get_state_dir(), prefix, key, extension)
+        except OSError as e:
+            self.module.fail_json(msg='Unable to use the state_dir for shared state files: %s' % str(e))
+
+    def prune_state_cache(self):
+        """
+        Remove state_cache files that were not updated for STATE_CACHE_MAX_AGE seconds, once per module run
+        """
+        if self.state_cache_pruned:
+            return
+        self.state_cache_pruned = True
+        expired = time.time() - STATE_CACHE_MAX_AGE
+        try:
+            state_dir = self.get_state_dir()
+            names = os.listdir(state_dir)
+        except OSError:
+            return
+        for name in names:
+            if not (name.startswith('intersight-state-') and name.endswith('.json')):
+                continue
+            path = os.path.join(state_dir, name)
+            try:
+                file_stat = os.lstat(path)
+                if stat.S_ISREG(file_stat.st_mode) and file_stat.st_uid == os.geteuid() and file_stat.st_mtime < expired:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def start_profile(self):
+        """
+        Profile the rest of the module run with cProfile, and tracemalloc with the profile_memory option
+
+        Results are written to profile_dir when the module calls exit_json or fail_json, as
+        <module>-<timestamp>-<pid>.prof (pstats) and .snapshot (tracemalloc.Snapshot) files.
+        Only the main thread is profiled, time spent in call_many workers shows up as waits.
+        """
+        self.profile_path = os.path.join(
+            self.module.params['profile_dir'],
+            '{0}-{1}-{2}'.format(self.module._name, time.strftime('%Y%m%dT%H%M%S'), os.getpid()),
+        )
+        if self.module.params.get('profile_memory'):
+            tracemalloc.start(PROFILE_MEMORY_FRAMES)
+
+        def stop_before(method):
+            def wrapper(*args, **kwargs):
+                self.stop_profile()
+                return method(*args, **kwargs)
+            return wrapper
+
+        self.module.exit_json = stop_before(self.module.exit_json)
+        self.module.fail_json = stop_before(self.module.fail_json)
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self):
+        """
+        Stop profiling and write the profile files, failures to write are reported as warnings
+        """
+        if self.profiler is None:
+            return
+        profiler = self.profiler
+        self.profiler = None
+        profiler.disable()
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        try:
+            if not os.path.isdir(self.module.params['profile_dir']):
+                os.makedirs(self.module.params['profile_dir'])
+            profiler.dump_stats(self.profile_path + '.prof')
+            if snapshot is not None:
+                snapshot.dump(self.profile_path + '.snapshot')
+        except (OSError, IOError) as e:
+            self.module.warn('Unable to write profile to %s: %s' % (self.module.params['profile_dir'], str(e)))
 
     def get_sig_b64encode(self, data):
         """
@@ -162,23 +1489,26 @@ class IntersightModule():
         :param digest: string to be signed & hashed
         :return: instance of digest object
         """
-        # Python SDK code: Verify PEM Pre-Encapsulation Boundary
-        r = re.compile(r"\s*-----BEGIN (.*)-----\s+")
-        m = r.match(self.private_key)
-        if not m:
-            raise ValueError("Not a valid PEM pre boundary")
-        pem_header = m.group(1)
-        key = serialization.load_pem_private_key(self.private_key.encode(), None, default_backend())
-        if pem_header == 'RSA PRIVATE KEY':
-            sign = key.sign(data.encode(), padding.PKCS1v15(), hashes.SHA256())
-            self.digest_algorithm = 'rsa-sha256'
-        elif pem_header == 'EC PRIVATE KEY':
-            sign = key.sign(data.encode(), ec.ECDSA(hashes.SHA256()))
-            self.digest_algorithm = 'hs2019'
-        else:
-            raise Exception("Unsupported key: {0}".format(pem_header))
+        # the private key is parsed once and reused for every request made by this module
+        if self.signer is None:
+            self.signer = PrivateKeySigner(self.private_key)
+        self.digest_algorithm = self.signer.algorithm
+
+        return self.signer.sign(data)
 
-        return b64encode(sign)
+    def get_request_signer(self):
+        """
+        RequestSigner shared by every request made by this module
+
+        :return: RequestSigner instance
+        """
+        with self.lock:
+            if self.request_signer is None:
+                if self.signer is None:
+                    self.signer = PrivateKeySigner(self.private_key)
+                self.digest_algorithm = self.signer.algorithm
+                self.request_signer = RequestSigner(self.public_key, self.signer, self.target_host)
+        return self.request_signer
 
     def get_auth_header(self, hdrs, signed_msg):
         """
@@ -189,46 +1519,129 @@ class IntersightModule():
         :return: concatenated authorization header
         """
 
-        auth_str = "Signature"
-
-        auth_str = auth_str + " " + "keyId=\"" + self.public_key + "\"," + "algorithm=\"" + self.digest_algorithm + "\","
-
-        auth_str = auth_str + "headers=\"(request-target)"
+        signed_headers = " ".join(["(request-target)"] + [key.lower() for key in hdrs])
 
-        for key, dummy in hdrs.items():
-            auth_str = auth_str + " " + key.lower()
-        auth_str = auth_str + "\""
+        return 'Signature keyId="{0}",algorithm="{1}",headers="{2}",signature="{3}"'.format(
+            self.public_key, self.digest_algorithm, signed_headers, signed_msg.decode('ascii'))
 
-        auth_str = auth_str + "," + "signature=\"" + signed_msg.decode('ascii') + "\""
-
-        return auth_str
-
-    def get_moid_by_name(self, resource_path, target_name):
+    def get_moid_by_name(self, resource_path, target_name, organization=None):
         """
         Retrieve an Intersight object moid by name
 
         :param resource_path: intersight resource path e.g. '/ntp/Policies'
         :param target_name: intersight object name
-        :return: json http response object
+        :param organization: organization name the object belongs to (any organization if None)
+        :return: located moid
         """
-        query_params = {
-            "$filter": "Name eq '{0}'".format(target_name)
-        }
+        located_moid = self.resolve_moid(resource_path, target_name, organization)
+        if located_moid is None:
+            raise KeyError('Intersight object with name "{0}" not found!'.format(target_name))
 
-        options = {
-            "http_method": "GET",
-            "resource_path": resource_path,
-            "query_params": query_params
-        }
+        return located_moid
 
-        get_moid = self.intersight_call(**options)
+    def resolve_moid(self, resource_path, name, organization=None, query_filter=None):
+        """
+        Resolve an object name to its Moid, using the Moid cache when possible
 
-        if get_moid.json()['Results'] is not None:
-            located_moid = get_moid.json()['Results'][0]['Moid']
-        else:
-            raise KeyError('Intersight object with name "{0}" not found!'.format(target_name))
+        :param resource_path: intersight resource path e.g. '/organization/Organizations'
+        :param name: intersight object name
+        :param organization: organization name the object belongs to (any organization if None)
+        :param query_filter: additional $filter clause e.g. "Type eq 'IMC'"
+        :return: Moid or None if the object was not found
+        """
+        moid = self.moid_cache.get(resource_path, name, organization, query_filter)
+        if moid is not None:
+            return moid
+        filter_str = "Name eq '{0}'".format(name)
+        if organization is not None:
+            filter_str += " and Organization.Name eq '{0}'".format(organization)
+        if query_filter:
+            filter_str += " and " + query_filter
+        response = self.call_api(
+            http_method='get',
+            resource_path=resource_path,
+            query_params={
+                '$filter': filter_str,
+                '$select': 'Moid',
+                '$top': 1,
+            },
+        )
+        results = response.get('Results')
+        if not results:
+            # not found is not cached, the object may be created later in the run
+            return None
+        moid = results[0]['Moid']
+        self.moid_cache.set(resource_path, name, moid, organization, query_filter)
+        return moid
 
-        return located_moid
+    def resolve_moids(self, references, organization=None, query_filter=None):
+        """
+        Resolve many object names to Moids with one Name in (...) query per resource path
+
+        Names in the Moid cache are not queried.  The queries for different resource paths (and
+        for name lists split by get_name_filters) are sent concurrently with call_many, queries
+        that match more than one page of objects (e.g. a name used in several organizations) read
+        the remaining pages afterwards.
+
+        :param references: list of (resource_path, name) tuples, empty names are skipped
+        :param organization: organization name the objects belong to (any organization if None)
+        :param query_filter: additional $filter clause e.g. "Type eq 'IMC'"
+        :return: dict of (resource_path, name) to Moid, names that were not found are left out
+        """
+        moids = {}
+        names_by_path = {}
+        for resource_path, name in references:
+            if not name or (resource_path, name) in moids:
+                continue
+            moid = self.moid_cache.get(resource_path, name, organization, query_filter)
+            if moid is not None:
+                moids[(resource_path, name)] = moid
+            elif name not in names_by_path.setdefault(resource_path, []):
+                names_by_path[resource_path].append(name)
+
+        batch_filter = query_filter
+        if organization is not None:
+            batch_filter = "Organization.Name eq '{0}'".format(organization)
+            if query_filter:
+                batch_filter += " and " + query_filter
+        page_size = min(self.module.params.get('page_size') or DEFAULT_PAGE_SIZE, DEFAULT_PAGE_SIZE)
+        batches = []
+        requests = []
+        for resource_path, names in iteritems(names_by_path):
+            for batch, filter_str in get_name_filters(names, batch_filter):
+                batches.append((resource_path, batch))
+                requests.append({
+                    'http_method': 'get',
+                    'resource_path': resource_path,
+                    'query_params': {
+                        '$filter': filter_str,
+                        '$select': 'Name,Moid',
+                        '$top': page_size,
+                    },
+                })
+        for (resource_path, batch), request, result in zip(batches, requests, self.call_many(requests)):
+            if result['error']:
+                self.module.fail_json(msg=result['error'])
+            results = result['response'].get('Results') or []
+            if len(results) >= page_size:
+                # the first page is full, read the rest of the matching objects
+                query_params = dict(request['query_params'])
+                del query_params['$top']
+                query_params['$skip'] = len(results)
+                results = results + list(self.iter_results(resource_path, query_params))
+            for item in results:
+                key = (resource_path, item.get('Name'))
+                if item.get('Name') in batch and key not in moids:
+                    moids[key] = item['Moid']
+                    self.moid_cache.set(resource_path, item['Name'], item['Moid'], organization, query_filter)
+        return moids
+
+    def invalidate_moid(self, method, resource_path, moid=None, name=None, body=None):
+        """
+        Drop cached Moid resolutions made stale by a DELETE, or by a PATCH that renames the object
+        """
+        if method.upper() == 'DELETE' or (method.upper() == 'PATCH' and isinstance(body, dict) and 'Name' in body):
+            self.moid_cache.invalidate(resource_path, moid=moid, name=name)
 
     def call_api(self, **options):
         """
@@ -238,19 +1651,304 @@ class IntersightModule():
         """
 
         try:
-            response, info = self.intersight_call(**options)
-            if not re.match(r'2..', str(info['status'])):
-                raise RuntimeError(info['status'], info['msg'], info['body'])
+            return self.api_request(**options)
         except Exception as e:
             self.module.fail_json(msg="API error: %s " % str(e))
 
+    def api_request(self, **options):
+        """
+        Call the Intersight API and raise an exception for an unsuccessful status
+
+        Identical GETs share one API call (see shared_get).  Writes drop every shared GET, and the
+        cached GETs of the same resource path.
+
+        :param options: options dict with method and other params for API call
+        :return: json http response object
+        """
+        if options.get('http_method', '').upper() == 'GET':
+            return self.shared_get(**options)
+        try:
+            return self.send_request(**options)
+        finally:
+            self.invalidate_responses(options.get('resource_path', ''))
+
+    def shared_get(self, **options):
+        """
+        GET with single-flight deduplication
+
+        Concurrent identical GETs (same resource path, moid, and query parameters) wait for the
+        first one instead of sending their own request.  Successful responses with at most
+        SHARED_GET_MAX_RESULTS results are kept until the next write, larger responses (e.g.
+        inventory pages) and errors are not.  Each caller gets its own copy of the response.
+
+        :param options: options dict with method and other params for API call
+        :return: copy of the json http response object
+        """
+        resource_path = options.get('resource_path', '')
+        key = json.dumps([resource_path, options.get('moid'), options.get('name'), sorted((options.get('query_params') or {}).items())])
+        with self.lock:
+            entry = self.shared_gets.get(key)
+            leader = entry is None
+            if leader:
+                entry = self.shared_gets[key] = dict(
+                    event=threading.Event(),
+                    response=None,
+                    error=None,
+                )
+            elif 'api_stats' in self.result:
+                self.result['api_stats']['shared_gets'] += 1
+        if leader:
+            try:
+                entry['response'] = self.cached_request(key, **options)
+            except Exception as e:
+                entry['error'] = e
+            finally:
+                if entry['response'] is None or len(entry['response'].get('Results') or []) > SHARED_GET_MAX_RESULTS:
+                    with self.lock:
+                        if self.shared_gets.get(key) is entry:
+                            del self.shared_gets[key]
+                entry['event'].set()
+        else:
+            entry['event'].wait()
+        if entry['error'] is not None:
+            raise entry['error']
+        if entry['response'] is None:
+            raise RuntimeError('Shared GET of %s did not complete' % resource_path)
+        return copy.deepcopy(entry['response'])
+
+    def cached_request(self, key, **options):
+        """
+        GET through the response cache when the resource path has a response cache TTL
+
+        :param key: request key of the GET (see shared_get)
+        :param options: options dict with method and other params for API call
+        :return: json http response object
+        """
+        resource_path = options.get('resource_path', '')
+        ttl = self.response_cache.get_ttl(resource_path) if self.response_cache else 0
+        if ttl <= 0:
+            return self.send_request(**options)
+        response = self.response_cache.get(key)
+        with self.lock:
+            self.result['response_cache']['misses' if response is None else 'hits'] += 1
+        if response is None:
+            response = self.send_request(**options)
+            self.response_cache.set(key, resource_path, response, ttl)
+        return response
+
+    def invalidate_responses(self, resource_path):
+        """
+        Drop every shared GET and the cached responses for the collection a write was made to, e.g. '/ntp/Policies'
+
+        Shared GETs of other collections are dropped too, since they can embed the written object
+        (e.g. an $expand of EndPointUserRoles in /iam/EndPointUserPolicies).
+        """
+        with self.lock:
+            self.shared_gets.clear()
+        if self.response_cache and self.response_cache.get_ttl(resource_path) > 0:
+            self.response_cache.invalidate(resource_path)
+
+    def send_request(self, **options):
+        """
+        Call the Intersight API and raise an exception for an unsuccessful status
+        :param options: options dict with method and other params for API call
+        :return: json http response object
+        """
+        response, info = self.retry_call(**options)
+        if not re.match(r'2..', str(info['status'])):
+            raise RuntimeError(info['status'], info['msg'], info.get('body'))
+        self.invalidate_moid(
+            options.get('http_method', ''), options.get('resource_path', ''),
+            options.get('moid'), options.get('name'), options.get('body'),
+        )
+
         response_data = response.read()
         if len(response_data) > 0:
-            resp_json = json.loads(response_data)
+            resp_json = json_loads(response_data)
             resp_json['trace_id'] = info.get('x-starship-traceid')
             return resp_json
         return {}
 
+    def call_many(self, requests, max_workers=None):
+        """
+        Call the Intersight API for independent requests concurrently
+
+        Requests share the keep-alive connection pool, so the total latency is close to that of the
+        slowest request instead of the sum of all of them.  With the adaptive_concurrency option the
+        number of requests in flight is also limited by the adaptive concurrency limit.
+
+        :param requests: list of options dicts as accepted by call_api
+        :param max_workers: maximum number of requests in flight (defaults to the max_concurrency option)
+        :return: list of dicts with response (json http response object) and error (None on success) in the same order as requests
+        """
+        def run(options):
+            try:
+                return dict(response=self.api_request(**options), error=None)
+            except Exception as e:
+                return dict(response={}, error="API error: %s " % str(e))
+
+        workers = min(len(requests), max_workers or self.module.params.get('max_concurrency') or 1)
+        if workers <= 1:
+            return [run(options) for options in requests]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, requests))
+
+    def retry_call(self, **options):
+        """
+        Invoke the Intersight API, retrying throttled and transient failures
+
+        429/503 responses are retried for any verb.  502/504 responses and connection failures are
+        retried for idempotent verbs only.  Retries stop after the retries option is exhausted or
+        when the next wait would pass the retry_deadline, and the last response is returned.
+        While the circuit breaker is open no request is sent and a -1 status is returned.
+
+        :param options: options dict with method and other params for intersight_call
+        :return: (response, info) tuple from the last attempt
+        """
+        method = options.get('http_method', '').upper()
+        retries = self.module.params.get('retries') or 0
+        start = time.time()
+        deadline = start + (self.module.params.get('retry_deadline') or 0)
+        attempt = 0
+        while True:
+            if self.circuit_breaker:
+                wait = self.circuit_breaker.allow()
+                if wait is not None:
+                    response = None
+                    info = dict(
+                        status=-1,
+                        msg='Circuit breaker open for %s after repeated API failures, retry in %d seconds' % (self.host, int(wait) + 1),
+                    )
+                    break
+            response, info = self.intersight_call(**options)
+            status = info['status']
+            if self.circuit_breaker:
+                self.circuit_breaker.record(status)
+            if status in RETRY_ANY_METHOD_STATUS_CODES:
+                retryable = True
+            else:
+                retryable = method in IDEMPOTENT_METHODS and (status in RETRY_STATUS_CODES or status == -1)
+            if not retryable or attempt >= retries:
+                break
+            delay = get_retry_delay(attempt, info.get('retry-after'))
+            if time.time() + delay > deadline:
+                break
+            attempt += 1
+            with self.lock:
+                self.result['api_retries']['count'] += 1
+                self.result['api_retries']['wait_time'] += delay
+            time.sleep(delay)
+        self.record_call(method, options.get('resource_path', ''), info, time.time() - start, attempt)
+        return response, info
+
+    def record_call(self, method, resource_path, info, latency, retries):
+        """
+        Add an API call to the api_stats result (when the api_stats option is set)
+
+        :param method: HTTP verb
+        :param resource_path: intersight resource path e.g. '/ntp/Policies'
+        :param info: info dict of the last attempt
+        :param latency: seconds from the first attempt to the final response, including retry waits
+        :param retries: number of retries
+        """
+        api_stats = self.result.get('api_stats')
+        if api_stats is None:
+            return
+        request_bytes = info.get('request_bytes', 0)
+        response_bytes = info.get('wire_bytes', 0)
+        with self.lock:
+            api_stats['calls'] += 1
+            api_stats['latency'] += latency
+            api_stats['request_bytes'] += request_bytes
+            api_stats['response_bytes'] += response_bytes
+            api_stats['requests'].append(dict(
+                method=method,
+                resource_path=resource_path,
+                status=info['status'],
+                latency=round(latency, 6),
+                request_bytes=request_bytes,
+                response_bytes=response_bytes,
+                retries=retries,
+                trace_id=info.get('x-starship-traceid'),
+            ))
+
+    def bulk_call(self, operations, action_on_error='Proceed'):
+        """
+        Run POST/PATCH/DELETE operations through the Intersight bulk API
+
+        Operations are submitted to /bulk/Requests in chunks of BULK_MAX_REQUESTS so many objects
+        can be configured with a handful of round trips.  With the adaptive_concurrency option and
+        action_on_error 'Proceed', chunks are submitted concurrently (see call_many).
+
+        :param operations: list of dicts with http_method, resource_path, and optional body and moid keys
+        :param action_on_error: 'Proceed' to run the rest of a chunk after a failed operation, or 'Stop'
+        :return: list of dicts with status, body, and error (None on success) in the same order as operations
+        """
+        # sub-request URIs are relative to /api, e.g. /v1/ntp/Policies
+        version_path = urlparse(self.host).path
+        if version_path.startswith('/api/'):
+            version_path = version_path[len('/api'):]
+        chunks = []
+        requests = []
+        for start in range(0, len(operations), BULK_MAX_REQUESTS):
+            chunk = operations[start:start + BULK_MAX_REQUESTS]
+            sub_requests = []
+            for operation in chunk:
+                method = operation['http_method'].upper()
+                if method not in ('POST', 'PATCH', 'DELETE'):
+                    self.module.fail_json(msg='Bulk operations must use POST, PATCH, or DELETE, not %s' % method)
+                sub_request = {
+                    'ObjectType': 'bulk.RestSubRequest',
+                    'Verb': method,
+                    'Uri': version_path + operation['resource_path'],
+                }
+                if operation.get('moid'):
+                    sub_request['TargetMoid'] = operation['moid']
+                if method != 'DELETE':
+                    sub_request['Body'] = operation.get('body') or {}
+                sub_requests.append(sub_request)
+            chunks.append(chunk)
+            requests.append(dict(
+                http_method='post',
+                resource_path='/bulk/Requests',
+                body={
+                    'Verb': sub_requests[0]['Verb'],
+                    'Uri': sub_requests[0]['Uri'],
+                    'ActionOnError': action_on_error,
+                    'Requests': sub_requests,
+                },
+            ))
+
+        if self.concurrency and action_on_error == 'Proceed':
+            responses = []
+            for call in self.call_many(requests):
+                if call['error']:
+                    self.module.fail_json(msg=call['error'])
+                responses.append(call['response'])
+        else:
+            responses = [self.call_api(**request) for request in requests]
+
+        results = []
+        for chunk, response in zip(chunks, responses):
+            self.result['trace_id'] = response.get('trace_id')
+            for operation in chunk:
+                self.invalidate_responses(operation['resource_path'])
+            sub_results = response.get('Results') or []
+            for index in range(len(chunk)):
+                if index >= len(sub_results):
+                    results.append(dict(status=None, body=None, error='No result returned by /bulk/Requests'))
+                    continue
+                status = sub_results[index].get('Status')
+                body = sub_results[index].get('Body')
+                error = None
+                if not re.match(r'2..', str(status)):
+                    error = 'Bulk operation failed with status %s: %s' % (status, body.get('message', body) if isinstance(body, dict) else body)
+                if error is None:
+                    operation = chunk[index]
+                    self.invalidate_moid(operation['http_method'], operation['resource_path'], operation.get('moid'), body=operation.get('body'))
+                results.append(dict(status=status, body=body, error=error))
+        return results
+
     def intersight_call(self, http_method="", resource_path="", query_params=None, body=None, moid=None, name=None):
         """
         Invoke the Intersight API
@@ -263,11 +1961,8 @@ class IntersightModule():
         :return: json http response object
         """
 
-        target_host = urlparse(self.host).netloc
-        target_path = urlparse(self.host).path
         query_path = ""
         method = http_method.upper()
-        bodyString = ""
 
         # Verify an accepted HTTP verb was chosen
         if (method not in ['GET', 'POST', 'PATCH', 'DELETE']):
@@ -305,67 +2000,307 @@ class IntersightModule():
             resource_path += "/" + moid
 
         # Check for GET request to properly form body
+        data = None
         if method != "GET":
-            bodyString = json.dumps(body)
+            data = json_dumps(body)
 
         # Concatenate URLs for headers
         target_url = self.host + resource_path + query_path
-        request_target = method.lower() + " " + target_path + resource_path + query_path
-
-        # Get the current GMT Date/Time
-        cdate = get_gmt_date()
-
-        # Generate the body digest
-        body_digest = get_sha256_digest(bodyString)
-        b64_body_digest = b64encode(body_digest.digest())
-
-        # Generate the authorization header
-        auth_header = {
-            'Host': target_host,
-            'Date': cdate,
-            'Digest': "SHA-256=" + b64_body_digest.decode('ascii'),
-        }
+        request_target = method.lower() + " " + self.target_path + resource_path + query_path
 
-        string_to_sign = prepare_str_to_sign(request_target, auth_header)
-        b64_signed_msg = self.get_sig_b64encode(string_to_sign)
-        auth_header = self.get_auth_header(auth_header, b64_signed_msg)
-
-        # Generate the HTTP requests header
+        # Generate the HTTP requests header, Host, Date, Digest, and Authorization are filled in by the signer
         request_header = {
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
             'Content-Type': 'application/json',
-            'Host': '{0}'.format(target_host),
-            'Date': '{0}'.format(cdate),
-            'Digest': 'SHA-256={0}'.format(b64_body_digest.decode('ascii')),
-            'Authorization': '{0}'.format(auth_header),
         }
-
-        response, info = fetch_url(self.module, target_url, data=bodyString, headers=request_header, method=method, use_proxy=self.module.params['use_proxy'])
+        # wait for a request slot and rate limit token before signing so the Date header is current when the request is sent
+        started = self.concurrency.acquire() if self.concurrency else None
+        sent = None
+        info = dict(status=-1)
+        try:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            request_header.update(self.get_request_signer().headers(request_target, data))
+
+            sent = time.time()
+            if method == 'GET' and self.hedger:
+                # the request threads hold the slot until their request completes
+                slot, started = started, None
+                response, info = self.hedged_request(target_url, request_header, slot)
+            else:
+                response, info = self.connection_pool.request(target_url, method, data=data, headers=request_header)
+        finally:
+            if self.concurrency and started is not None:
+                self.concurrency.release(started, info['status'], time.time() - sent if sent else 0.0)
+        info['request_bytes'] = len(data or b'')
+        if response is not None:
+            with self.lock:
+                self.result['api_transfer']['wire_bytes'] += response.wire_bytes
+                self.result['api_transfer']['decoded_bytes'] += len(response.data)
 
         return response, info
 
+    def hedged_request(self, url, headers, slot=None):
+        """
+        GET that is sent again if no response arrived within the hedge delay (see RequestHedger)
+
+        The duplicate uses the same signed headers on another pooled connection and takes a token
+        from the rate limiter.  With the adaptive_concurrency option it also needs a free request
+        slot, no duplicate is sent while the concurrency limit is reached.  The first successful
+        response wins, the other request finishes in the background and is ignored.
+
+        :param url: request URL
+        :param headers: signed request headers
+        :param slot: adaptive concurrency slot of the request, released when the request completes
+        :return: (response, info) tuple of the first successful response, or of the last failed one
+        """
+        responses = queue.Queue()
+
+        def send(hedge, slot=None):
+            # always answer, a request thread that dies silently would leave the caller waiting forever
+            response = None
+            info = dict(url=url, status=-1, msg='Request failed')
+            error = None
+            started = time.time()
+            try:
+                response, info = self.connection_pool.request(url, 'GET', headers=headers)
+                if info['status'] != -1:
+                    self.hedger.add_latency(time.time() - started, hedge)
+            except ValueError as e:
+                # an invalid request is raised to the caller instead of being retried
+                error = e
+            except Exception as e:
+                if response is None:
+                    info['msg'] = 'Request failed: %s' % str(e)
+            finally:
+                if slot is not None:
+                    self.concurrency.release(slot, info['status'], time.time() - started)
+                responses.put((response, info, error))
+
+        def receive(timeout=None):
+            response, info, error = responses.get(timeout=timeout)
+            if error is not None:
+                raise error
+            return response, info
+
+        delay = self.hedger.get_delay()
+        if delay is None:
+            send(False, slot)
+            return receive()
+        threading.Thread(target=send, args=(False, slot), daemon=True).start()
+        pending = 1
+        try:
+            return receive(timeout=delay)
+        except queue.Empty:
+            pass
+        # the duplicate counts against the concurrency limit and the shared rate limit like any other request
+        slot = self.concurrency.acquire(blocking=False) if self.concurrency else None
+        if self.concurrency and slot is None:
+            hedge = False
+        else:
+            hedge = self.hedger.take()
+            if not hedge and slot is not None:
+                self.concurrency.cancel()
+        if hedge:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            threading.Thread(target=send, args=(True, slot), daemon=True).start()
+            pending += 1
+            if 'api_stats' in self.result:
+                with self.lock:
+                    self.result['api_stats']['hedged'] += 1
+        while True:
+            response, info = receive()
+            pending -= 1
+            if pending == 0 or not (info['status'] == -1 or info['status'] >= 500):
+                return response, info
+
+    def iter_pages(self, resource_path, query_params=None, page_size=None):
+        """
+        GET a resource one page at a time using $top/$skip pagination
+
+        Only the current page is held in memory.  A $top in query_params limits the total number
+        of results and a $skip sets the starting offset.  Queries that do not return a Results
+        list (e.g. $count) are issued once.
+
+        With the adaptive_concurrency option, pages after a full first page are prefetched up to
+        the current concurrency limit, so that many pages may be held in memory.  Prefetched pages
+        past the end of the results are discarded.
+
+        :param resource_path: intersight resource path e.g. '/compute/PhysicalSummaries'
+        :param query_params: dictionary object with query string parameters as key/value pairs
+        :param page_size: number of results requested per page (defaults to the page_size option)
+        :return: generator of API response dicts, one per page
+        """
+        if not page_size:
+            page_size = self.module.params.get('page_size') or DEFAULT_PAGE_SIZE
+        # larger pages are cut to DEFAULT_PAGE_SIZE by the API and would look like the last page
+        page_size = min(page_size, DEFAULT_PAGE_SIZE)
+        pages = get_page_queries(query_params, page_size)
+        for page, top in pages:
+            response = self.call_api(
+                http_method='get',
+                resource_path=resource_path,
+                query_params=page,
+            )
+            yield response
+            if is_last_page(response, top):
+                # last (or only) page
+                return
+            if self.concurrency:
+                # the rest of the pages are prefetched below
+                break
+        else:
+            return
+
+        # prefetch the following pages
+        executor = ThreadPoolExecutor(max_workers=self.concurrency.maximum)
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < self.concurrency.get_limit():
+                    page, top = next(pages, (None, None))
+                    if page is None:
+                        break
+                    future = executor.submit(self.api_request, http_method='get', resource_path=resource_path, query_params=page)
+                    pending.append((future, top))
+                if not pending:
+                    return
+                future, top = pending.popleft()
+                try:
+                    response = future.result()
+                except Exception as e:
+                    self.module.fail_json(msg="API error: %s " % str(e))
+                yield response
+                if is_last_page(response, top):
+                    return
+        finally:
+            for future, top in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def iter_results(self, resource_path, query_params=None, page_size=None):
+        '''
+        GET a resource and yield each element of the Results list across all pages
+        '''
+        for response in self.iter_pages(resource_path, query_params, page_size):
+            for item in response.get('Results') or []:
+                yield item
+
     def get_resource(self, resource_path, query_params, return_list=False):
         '''
         GET a resource and return the 1st element found or the full Results list
         '''
-        options = {
-            'http_method': 'get',
-            'resource_path': resource_path,
-            'query_params': query_params,
-        }
-        response = self.call_api(**options)
-        if response.get('Results'):
+        results = []
+        response = {}
+        # only the 1st element is needed unless the full list was requested
+        page_size = None if return_list else 1
+        for response in self.iter_pages(resource_path, query_params, page_size):
+            results.extend(response.get('Results') or [])
+            if not return_list:
+                break
+        if results:
             if return_list:
-                self.result['api_response'] = response['Results']
+                self.result['api_response'] = results
             else:
                 # return the 1st list element
-                self.result['api_response'] = response['Results'][0]
+                self.result['api_response'] = results[0]
         self.result['trace_id'] = response.get('trace_id')
 
-    def configure_resource(self, moid, resource_path, body, query_params, update_method=''):
+    def get_state(self, resource_path, query_params):
+        '''
+        GET the current state of a resource and return the 1st element found
+
+        With the state_cache option a Moid,ModTime projection of the query is requested first and the
+        full object is only downloaded when its ModTime differs from the copy cached in state_dir.
+        Only the object's own ModTime is checked, so expanded objects other than Organization should
+        not be compared from a cached state.  State files that cannot be used are ignored (a full GET
+        is made), and files not updated for STATE_CACHE_MAX_AGE seconds are removed.
+        '''
+        if not self.module.params.get('state_cache'):
+            return self.get_resource(resource_path, query_params)
+        check_params = dict(query_params)
+        check_params.pop('$expand', None)
+        check_params['$select'] = 'Moid,ModTime'
+        check_params['$top'] = 1
+        response = self.call_api(
+            http_method='get',
+            resource_path=resource_path,
+            query_params=check_params,
+        )
+        self.result['trace_id'] = response.get('trace_id')
+        if not response.get('Results'):
+            # the resource does not exist
+            return
+        current = response['Results'][0]
+        self.prune_state_cache()
+        try:
+            path = get_state_path(
+                self.get_state_dir(),
+                'state',
+                json.dumps([self.host, self.public_key, resource_path, current['Moid'], query_params.get('$select'), query_params.get('$expand')]),
+            )
+            with locked_json_state(path) as state:
+                if current.get('ModTime') and state.get('ModTime') == current['ModTime']:
+                    # unchanged since it was last read
+                    self.result['api_response'] = state['body']
+                    return
+        except OSError:
+            # no usable state file, same as without the state_cache option
+            path = None
+        self.get_resource(resource_path, query_params)
+        body = self.result['api_response']
+        if path and body.get('Moid') == current['Moid'] and body.get('ModTime'):
+            try:
+                with locked_json_state(path) as state:
+                    state['ModTime'] = body['ModTime']
+                    state['body'] = body
+            except OSError:
+                pass
+
+    def compare_resource(self, expected, actual):
+        """
+        compare_values that also reports the differences as the module diff when run with --diff
+
+        :param expected: API body built from module parameters
+        :param actual: current state of the resource
+        :return: True if the values match
+        """
+        if not getattr(self.module, '_diff', False):
+            return compare_values(expected, actual)
+        diffs = list(iter_value_diffs(expected, actual))
+        if diffs:
+            self.result['diff'] = dict(
+                before=dict((path, remove_excluded_keys(actual_value)) for path, dummy, actual_value in diffs),
+                after=dict((path, remove_excluded_keys(expected_value)) for path, expected_value, dummy in diffs),
+            )
+        return not diffs
+
+    def get_patch_keys(self, expected, actual):
+        """
+        Top-level keys to PATCH when a resource is updated with the compared body (patch_delta option)
+
+        :param expected: API body built from module parameters
+        :param actual: current state of the resource
+        :return: set of changed keys to pass to configure_resource, None to send the full body
+        """
+        if self.module.params.get('patch_delta') and isinstance(expected, dict) and isinstance(actual, dict):
+            return get_changed_keys(expected, actual)
+        return None
+
+    def configure_resource(self, moid, resource_path, body, query_params, update_method='', patch_keys=None):
+        """
+        Create (POST) or update (PATCH) a resource
+
+        :param patch_keys: changed top-level keys from get_patch_keys of this body, a PATCH then only sends those (patch_delta option)
+        """
         if not self.module.check_mode:
             if moid and update_method != 'post':
                 # update the resource - user has to specify all the props they want updated
+                if patch_keys is not None:
+                    # patch_delta: only send what get_patch_keys found to be different
+                    body = get_patch_body(body, patch_keys)
                 options = {
                     'http_method': 'patch',
                     'resource_path': resource_path,
@@ -412,38 +2347,33 @@ class IntersightModule():
 
     def configure_policy_or_profile(self, resource_path):
         # Configure (create, update, or delete) the policy or profile
-        organization_moid = None
         # GET Organization Moid
-        self.get_resource(
-            resource_path='/organization/Organizations',
-            query_params={
-                '$filter': "Name eq '" + self.module.params['organization'] + "'",
-                '$select': 'Moid',
-            },
-        )
-        if self.result['api_response'].get('Moid'):
-            # resource exists and moid was returned
-            organization_moid = self.result['api_response']['Moid']
+        organization_moid = self.resolve_moid('/organization/Organizations', self.module.params['organization'])
 
         self.result['api_response'] = {}
         # Get the current state of the resource
         filter_str = "Name eq '" + self.module.params['name'] + "'"
         filter_str += "and Organization.Moid eq '" + organization_moid + "'"
-        self.get_resource(
+        self.get_state(
             resource_path=resource_path,
-            query_params={
-                '$filter': filter_str,
-                '$expand': 'Organization',
-            }
+            query_params=add_state_select(
+                {
+                    '$filter': filter_str,
+                    '$expand': 'Organization',
+                },
+                self.api_body,
+            ),
         )
 
         moid = None
         resource_values_match = False
+        patch_keys = None
         if self.result['api_response'].get('Moid'):
             # resource exists and moid was returned
             moid = self.result['api_response']['Moid']
             if self.module.params['state'] == 'present':
-                resource_values_match = compare_values(self.api_body, self.result['api_response'])
+                resource_values_match = self.compare_resource(self.api_body, self.result['api_response'])
+                patch_keys = self.get_patch_keys(self.api_body, self.result['api_response'])
             else:  # state == 'absent'
                 self.delete_resource(
                     moid=moid,
@@ -465,7 +2395,8 @@ class IntersightModule():
                 body=self.api_body,
                 query_params={
                     '$filter': filter_str
-                }
+                },
+                patch_keys=patch_keys,
             )
             if self.result['api_response'].get('Moid'):
                 # resource exists and moid was returned
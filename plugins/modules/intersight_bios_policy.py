@@ -8682,7 +8682,6 @@ def main():
     check_and_add_prop('OnboardScuStorageSupport', 'onboard_scu_storage_support', intersight.module.params, intersight.api_body)
     check_and_add_prop('OnboardScuStorageSwStack', 'onboard_scu_storage_sw_stack', intersight.module.params, intersight.api_body)
     check_and_add_prop('OperationMode', 'operation_mode', intersight.module.params, intersight.api_body)
-    check_and_add_prop('Organization', 'organization', intersight.module.params, intersight.api_body)
     check_and_add_prop('OsBootWatchdogTimer', 'os_boot_watchdog_timer', intersight.module.params, intersight.api_body)
     check_and_add_prop('OsBootWatchdogTimerPolicy', 'os_boot_watchdog_timer_policy', intersight.module.params, intersight.api_body)
     check_and_add_prop('OsBootWatchdogTimerTimeout', 'os_boot_watchdog_timer_timeout', intersight.module.params, intersight.api_body)
@@ -114,7 +114,7 @@ api_repsonse:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, compare_values
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, add_state_select
 
 
 def main():
@@ -148,21 +148,26 @@ def main():
     }
 
     # get the current state of the resource
-    intersight.get_resource(
+    intersight.get_state(
         resource_path='/access/Policies',
-        query_params={
-            '$filter': "Name eq '" + intersight.module.params['name'] + "'",
-            '$expand': 'Organization',
-        },
+        query_params=add_state_select(
+            {
+                '$filter': "Name eq '" + intersight.module.params['name'] + "'",
+                '$expand': 'Organization',
+            },
+            intersight.api_body,
+        ),
     )
 
     moid = None
     resource_values_match = False
+    patch_keys = None
     if intersight.result['api_response'].get('Moid'):
         # resource exists and moid was returned
         moid = intersight.result['api_response']['Moid']
         if module.params['state'] == 'present':
-            resource_values_match = compare_values(intersight.api_body, intersight.result['api_response'])
+            resource_values_match = intersight.compare_resource(intersight.api_body, intersight.result['api_response'])
+            patch_keys = intersight.get_patch_keys(intersight.api_body, intersight.result['api_response'])
         else:  # state == 'absent'
             intersight.delete_resource(
                 moid=moid,
@@ -175,17 +180,7 @@ def main():
         intersight.api_body.pop('Organization')
         if not moid:
             # GET Organization Moid
-            intersight.get_resource(
-                resource_path='/organization/Organizations',
-                query_params={
-                    '$filter': "Name eq '" + intersight.module.params['organization'] + "'",
-                    '$select': 'Moid',
-                },
-            )
-            organization_moid = None
-            if intersight.result['api_response'].get('Moid'):
-                # resource exists and moid was returned
-                organization_moid = intersight.result['api_response']['Moid']
+            organization_moid = intersight.resolve_moid('/organization/Organizations', intersight.module.params['organization'])
             # Organization must be set, but can't be changed after initial POST
             intersight.api_body['Organization'] = {
                 'Moid': organization_moid,
@@ -197,6 +192,7 @@ def main():
             query_params={
                 '$filter': "Name eq '" + intersight.module.params['name'] + "'",
             },
+            patch_keys=patch_keys,
         )
 
     module.exit_json(**intersight.result)
@@ -71,26 +71,25 @@ intersight_servers:
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, get_name_filters
 
 
 def get_servers(module, intersight):
-    query_list = []
+    # one Name in (...) query per batch of server names, or all servers
+    query_list = ['']
     if module.params['server_names']:
-        for server in module.params['server_names']:
-            query_list.append("Name eq '%s'" % server)
-    query_str = ' or '.join(query_list)
-    options = {
-        'http_method': 'get',
-        'resource_path': '/compute/PhysicalSummaries',
-        'query_params': {
-            '$filter': query_str,
-            '$top': 1000,
-        }
-    }
-    response_dict = intersight.call_api(**options)
-
-    return response_dict.get('Results')
+        query_list = [query_str for dummy, query_str in get_name_filters(module.params['server_names'])]
+    servers = []
+    for query_str in query_list:
+        # all pages of results are returned
+        servers.extend(intersight.iter_results(
+            resource_path='/compute/PhysicalSummaries',
+            query_params={
+                '$filter': query_str,
+            },
+        ))
+
+    return servers or None
 
 
 def main():
@@ -108,8 +107,9 @@ def main():
 
     intersight = IntersightModule(module)
 
-    # one API call returning all requested servers
-    module.exit_json(intersight_servers=get_servers(module, intersight))
+    # paged API calls returning all requested servers
+    intersight.result['intersight_servers'] = get_servers(module, intersight)
+    module.exit_json(**intersight.result)
 
 
 if __name__ == '__main__':
@@ -166,7 +166,7 @@ api_repsonse:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, compare_values
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec
 
 
 def main():
@@ -251,7 +251,7 @@ def main():
                     'Name': intersight.module.params['organization'],
                 },
             }
-            resource_values_match = compare_values(intersight.api_body, intersight.result['api_response'])
+            resource_values_match = intersight.compare_resource(intersight.api_body, intersight.result['api_response'])
         elif module.params['state'] == 'absent':
             intersight.delete_resource(
                 moid=user_policy_moid,
@@ -273,30 +273,28 @@ def main():
         organization_moid = None
         if not user_policy_moid or module.params['purge']:
             # get Organization Moid which is needed when resources are created
-            saved_response = intersight.result['api_response']
-            intersight.get_resource(
-                resource_path='/organization/Organizations',
-                query_params={
-                    '$filter': "Name eq '" + intersight.module.params['organization'] + "'",
-                    '$select': 'Moid',
-                },
-            )
-            if intersight.result['api_response'].get('Moid'):
-                # resource exists and moid was returned
-                organization_moid = intersight.result['api_response']['Moid']
-            intersight.result['api_response'] = saved_response
+            organization_moid = intersight.resolve_moid('/organization/Organizations', intersight.module.params['organization'])
             if not user_policy_moid:
                 # Initial create: Organization must be set, but can't be changed after initial POST
                 intersight.api_body['Organization'] = {
                     'Moid': organization_moid,
                 }
             elif module.params['purge']:
-                # update existing resource and purge any existing users
-                for end_point_user_role in intersight.result['api_response']['EndPointUserRoles']:
-                    intersight.delete_resource(
-                        moid=end_point_user_role['Moid'],
-                        resource_path='/iam/EndPointUserRoles',
-                    )
+                # update existing resource and purge any existing users with one bulk request
+                end_point_user_roles = intersight.result['api_response']['EndPointUserRoles']
+                if end_point_user_roles:
+                    if not module.check_mode:
+                        results = intersight.bulk_call([
+                            {
+                                'http_method': 'delete',
+                                'resource_path': '/iam/EndPointUserRoles',
+                                'moid': end_point_user_role['Moid'],
+                            } for end_point_user_role in end_point_user_roles
+                        ])
+                        errors = [result['error'] for result in results if result['error']]
+                        if errors:
+                            module.fail_json(msg='; '.join(errors))
+                    intersight.result['changed'] = True
         # configure the top-level policy resource
         intersight.result['api_response'] = {}
         intersight.configure_resource(
@@ -311,6 +309,11 @@ def main():
             # resource exists and moid was returned
             user_policy_moid = intersight.result['api_response']['Moid']
 
+        # EndPointRole Moids of all users with one query
+        end_point_role_moids = intersight.resolve_moids(
+            [('/iam/EndPointRoles', user['role']) for user in intersight.module.params['local_users']],
+            query_filter="Type eq 'IMC'",
+        )
         # EndPointUser local_users list config
         for user in intersight.module.params['local_users']:
             intersight.api_body = {
@@ -332,17 +335,7 @@ def main():
             if intersight.result['api_response'].get('Moid'):
                 # resource exists and moid was returned
                 user_moid = intersight.result['api_response']['Moid']
-            # GET EndPointRole Moid
-            intersight.get_resource(
-                resource_path='/iam/EndPointRoles',
-                query_params={
-                    '$filter': "Name eq '" + user['role'] + "' and Type eq 'IMC'",
-                },
-            )
-            end_point_role_moid = None
-            if intersight.result['api_response'].get('Moid'):
-                # resource exists and moid was returned
-                end_point_role_moid = intersight.result['api_response']['Moid']
+            end_point_role_moid = end_point_role_moids.get(('/iam/EndPointRoles', user['role']))
             # EndPointUserRole config
             intersight.api_body = {
                 'EndPointUser': {
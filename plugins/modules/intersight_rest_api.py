@@ -46,10 +46,19 @@ options:
     - Should be used instead of api_body if a list is required in the API payload.
     type: list
     elements: dict
+  bulk:
+    description:
+    - If C(yes), each list_body element is configured as a separate resource through the Intersight bulk API (/bulk/Requests).
+    - Elements are matched to existing resources by Name (limited by any $filter in query_params) and are created, updated, or deleted (state absent) as needed.
+    - Operations are sent in batches of up to 100 per API request.
+    - api_response is the list of resulting resources.
+    type: bool
+    default: no
   return_list:
     description:
     - If C(yes), will return a list of API results in the api_response.
     - By default only the 1st element of the API Results list is returned.
+    - All pages of results are retrieved using the page_size option, a $top in query_params limits the number of results.
     - Can only be used with GET operations.
     type: bool
     default: no
@@ -96,6 +105,17 @@ EXAMPLES = r'''
     }
     state: present
 
+- name: Configure VLANs with one bulk request per 100 VLANs
+  intersight_rest_api:
+    api_private_key: "{{ api_private_key }}"
+    api_key_id: "{{ api_key_id }}"
+    resource_path: /fabric/Vlans
+    query_params:
+      $filter: "EthNetworkPolicy.Moid eq '{{ eth_network_policy_moid }}'"
+    list_body: "{{ vlans }}"
+    bulk: yes
+    state: present
+
 - name: Delete Boot Policy
   intersight_rest_api:
     api_private_key: "{{ api_private_key }}"
@@ -136,10 +156,57 @@ api_repsonse:
     }
 '''
 
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, compare_values
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import (
+    IntersightModule, intersight_argument_spec, compare_values, get_changed_keys, get_patch_body, get_name_filters
+)
 from ansible.module_utils.basic import AnsibleModule
 
 
+def configure_bulk(intersight, module):
+    # Create, update, or delete each list_body element using /bulk/Requests
+    resource_path = module.params['resource_path']
+    base_filter = (module.params['query_params'] or {}).get('$filter')
+    names = [item['Name'] for item in module.params['list_body'] if item.get('Name')]
+    existing = {}
+    for dummy, filter_str in get_name_filters(names, base_filter):
+        for resource in intersight.iter_results(resource_path, {'$filter': filter_str}):
+            existing[resource['Name']] = resource
+
+    operations = []
+    # current resource, or the index of the bulk operation that configures it, for each list_body element
+    api_response = []
+    for item in module.params['list_body']:
+        current = existing.get(item.get('Name'))
+        if module.params['state'] == 'absent':
+            if current:
+                operations.append({'http_method': 'delete', 'resource_path': resource_path, 'moid': current['Moid']})
+            continue
+        if not current:
+            api_response.append(len(operations))
+            operations.append({'http_method': 'post', 'resource_path': resource_path, 'body': item})
+        elif not compare_values(item, current):
+            body = item
+            if module.params['patch_delta'] and module.params['update_method'] == 'patch':
+                body = get_patch_body(item, get_changed_keys(item, current))
+            api_response.append(len(operations))
+            operations.append({'http_method': module.params['update_method'], 'resource_path': resource_path, 'moid': current['Moid'], 'body': body})
+        else:
+            api_response.append(current)
+
+    results = []
+    if operations:
+        if not module.check_mode:
+            results = intersight.bulk_call(operations)
+        intersight.result['changed'] = True
+    # check mode or deleted resources have no bulk result
+    intersight.result['api_response'] = [
+        (results[item]['body'] if item < len(results) else {}) if isinstance(item, int) else item for item in api_response
+    ]
+    errors = [result['error'] for result in results if result['error']]
+    if errors:
+        module.fail_json(msg='; '.join(errors), **intersight.result)
+
+
 def main():
     argument_spec = intersight_argument_spec
     argument_spec.update(
@@ -148,6 +215,7 @@ def main():
         update_method=dict(type='str', choices=['patch', 'post'], default='patch'),
         api_body=dict(type='dict'),
         list_body=dict(type='list', elements='dict'),
+        bulk=dict(type='bool', default=False),
         return_list=dict(type='bool', default=False),
         state=dict(type='str', choices=['absent', 'present'], default='present'),
     )
@@ -159,6 +227,10 @@ def main():
             ['return_list', 'api_body'],
             ['return_list', 'state'],
             ['api_body', 'list_body'],
+            ['return_list', 'bulk'],
+        ],
+        required_if=[
+            ['bulk', True, ['list_body']],
         ],
     )
 
@@ -166,6 +238,10 @@ def main():
     intersight.result['api_response'] = {}
     intersight.result['trace_id'] = ''
 
+    if module.params['bulk']:
+        configure_bulk(intersight, module)
+        module.exit_json(**intersight.result)
+
     if module.params['list_body']:
         module.params['api_body'] = module.params['list_body']
 
@@ -189,11 +265,13 @@ def main():
 
     moid = None
     resource_values_match = False
+    patch_keys = None
     if (request_config or request_delete) and intersight.result['api_response'].get('Moid'):
         # resource exists and moid was returned
         moid = intersight.result['api_response']['Moid']
         if request_config:
-            resource_values_match = compare_values(module.params['api_body'], intersight.result['api_response'])
+            resource_values_match = intersight.compare_resource(module.params['api_body'], intersight.result['api_response'])
+            patch_keys = intersight.get_patch_keys(module.params['api_body'], intersight.result['api_response'])
         else:  # request_delete
             intersight.delete_resource(
                 moid=moid,
@@ -207,6 +285,7 @@ def main():
             body=module.params['api_body'],
             query_params=module.params['query_params'],
             update_method=module.params['update_method'],
+            patch_keys=patch_keys,
         )
     if module.params['return_list'] and not isinstance(intersight.result['api_response'], list):
         intersight.result['api_response'] = []
@@ -152,13 +152,8 @@ def get_policy_ref(intersight, policy_name, resource_path):
     intersight.result['api_response'] = {}
     intersight.result['trace_id'] = ''
     moid = None
-    query = str.format("Name eq '{policy}'", policy=policy_name)
-    intersight.get_resource(resource_path=resource_path, query_params={"$filter": query})
-    if intersight.result['api_response'].get('Moid'):
-        # resource exists and moid was returned
-        moid = intersight.result['api_response']['Moid']
-    intersight.result['api_response'] = {}
-    intersight.result['trace_id'] = ''
+    if policy_name:
+        moid = intersight.resolve_moid(resource_path, policy_name)
     return {"Moid": moid}
 
 
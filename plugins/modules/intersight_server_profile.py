@@ -154,41 +154,47 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec
 
 
-def post_profile_to_policy(intersight, moid, resource_path, policy_name):
-    options = {
-        'http_method': 'get',
-        'resource_path': resource_path,
-        'query_params': {
-            '$filter': "Name eq '" + policy_name + "'",
-        },
-    }
-    response = intersight.call_api(**options)
-    if response.get('Results'):
-        # get expected policy moid from 1st list element
-        expected_policy_moid = response['Results'][0]['Moid']
-        actual_policy_moid = ''
-        # check any current profiles and delete if needed
-        options = {
+def get_policy_state(intersight, moid, policies):
+    # resolve the requested policy names (batched per resource_path) and GET the policy currently attached to the profile for each (resource_path, policy_name) concurrently
+    expected_moids = intersight.resolve_moids(policies)
+    requests = []
+    for resource_path, policy_name in policies:
+        requests.append({
             'http_method': 'get',
             'resource_path': resource_path,
             'query_params': {
                 '$filter': "Profiles/any(t: t/Moid eq '" + moid + "')",
+                '$select': 'Moid',
             },
-        }
-        response = intersight.call_api(**options)
-        if response.get('Results'):
+        })
+    results = intersight.call_many(requests)
+    errors = [result['error'] for result in results if result['error']]
+    if errors:
+        intersight.module.fail_json(msg='; '.join(errors))
+    policy_state = []
+    for (resource_path, policy_name), result in zip(policies, results):
+        actual_policy_moid = ''
+        actual_response = result['response']
+        if actual_response.get('Results'):
             # get actual moid from 1st list element
-            actual_policy_moid = response['Results'][0]['Moid']
-            if actual_policy_moid != expected_policy_moid:
-                if not intersight.module.check_mode:
-                    # delete the actual policy
-                    options = {
-                        'http_method': 'delete',
-                        'resource_path': resource_path + '/' + actual_policy_moid + '/Profiles',
-                        'moid': moid,
-                    }
-                    intersight.call_api(**options)
-                actual_policy_moid = ''
+            actual_policy_moid = actual_response['Results'][0]['Moid']
+        policy_state.append((expected_moids.get((resource_path, policy_name)), actual_policy_moid))
+    return policy_state
+
+
+def post_profile_to_policy(intersight, moid, resource_path, expected_policy_moid, actual_policy_moid):
+    if expected_policy_moid:
+        # check any current profiles and delete if needed
+        if actual_policy_moid and actual_policy_moid != expected_policy_moid:
+            if not intersight.module.check_mode:
+                # delete the actual policy
+                options = {
+                    'http_method': 'delete',
+                    'resource_path': resource_path + '/' + actual_policy_moid + '/Profiles',
+                    'moid': moid,
+                }
+                intersight.call_api(**options)
+            actual_policy_moid = ''
         if not actual_policy_moid:
             if not intersight.module.check_mode:
                 # post profile to the expected policy
@@ -200,7 +206,7 @@ def post_profile_to_policy(intersight, moid, resource_path, policy_name):
                             'ObjectType': 'server.Profile',
                             'Moid': moid,
                         }
-                    ]
+                    ],
                 }
                 intersight.call_api(**options)
             intersight.result['changed'] = True
@@ -268,26 +274,20 @@ def main():
     # Configure the profile
     moid = intersight.configure_policy_or_profile(resource_path=resource_path)
 
-    if moid and intersight.module.params['boot_order_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/boot/PrecisionPolicies', policy_name=intersight.module.params['boot_order_policy'])
-
-    if moid and intersight.module.params['imc_access_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/access/Policies', policy_name=intersight.module.params['imc_access_policy'])
-
-    if moid and intersight.module.params['lan_connectivity_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/vnic/LanConnectivityPolicies', policy_name=intersight.module.params['lan_connectivity_policy'])
-
-    if moid and intersight.module.params['local_user_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/iam/EndPointUserPolicies', policy_name=intersight.module.params['local_user_policy'])
-
-    if moid and intersight.module.params['ntp_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/ntp/Policies', policy_name=intersight.module.params['ntp_policy'])
-
-    if moid and intersight.module.params['storage_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/storage/StoragePolicies', policy_name=intersight.module.params['storage_policy'])
-
-    if moid and intersight.module.params['virtual_media_policy']:
-        post_profile_to_policy(intersight, moid, resource_path='/vmedia/Policies', policy_name=intersight.module.params['virtual_media_policy'])
+    policies = [
+        ('/boot/PrecisionPolicies', intersight.module.params['boot_order_policy']),
+        ('/access/Policies', intersight.module.params['imc_access_policy']),
+        ('/vnic/LanConnectivityPolicies', intersight.module.params['lan_connectivity_policy']),
+        ('/iam/EndPointUserPolicies', intersight.module.params['local_user_policy']),
+        ('/ntp/Policies', intersight.module.params['ntp_policy']),
+        ('/storage/StoragePolicies', intersight.module.params['storage_policy']),
+        ('/vmedia/Policies', intersight.module.params['virtual_media_policy']),
+    ]
+    policies = [(resource_path, policy_name) for resource_path, policy_name in policies if policy_name]
+    if moid and policies:
+        policy_state = get_policy_state(intersight, moid, policies)
+        for (resource_path, dummy), (expected_policy_moid, actual_policy_moid) in zip(policies, policy_state):
+            post_profile_to_policy(intersight, moid, resource_path, expected_policy_moid, actual_policy_moid)
 
     module.exit_json(**intersight.result)
 
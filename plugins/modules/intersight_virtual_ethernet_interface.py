@@ -237,7 +237,7 @@ api_repsonse:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, compare_values
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, add_state_select
 
 
 def check_and_add_prop(prop, prop_key, params, api_body):
@@ -264,18 +264,10 @@ def to_camel_case(snake_str):
     return "".join(x.capitalize() for x in snake_str.lower().split("_"))
 
 
-def get_policy_ref(intersight, policy_name, resource_path):
-    intersight.result['api_response'] = {}
-    intersight.result['trace_id'] = ''
-    moid = None
-    query = str.format("Name eq '{policy}'", policy=policy_name)
-    intersight.get_resource(resource_path=resource_path, query_params={"$filter": query})
-    if intersight.result['api_response'].get('Moid'):
-        # resource exists and moid was returned
-        moid = intersight.result['api_response']['Moid']
-    intersight.result['api_response'] = {}
-    intersight.result['trace_id'] = ''
-    return {"Moid": moid}
+def get_policy_refs(intersight, policies):
+    # resolve the (policy_name, resource_path) references with one query per resource path, unset policies have no Moid
+    moids = intersight.resolve_moids([(resource_path, policy_name) for policy_name, resource_path in policies])
+    return [{"Moid": moids.get((resource_path, policy_name))} for policy_name, resource_path in policies]
 
 
 def main():
@@ -362,11 +354,13 @@ def main():
     intersight.result['api_response'] = {}
     intersight.result['trace_id'] = ''
 
-    eth_adapter_policy = get_policy_ref(intersight, intersight.module.params['eth_adapter_policy'], '/vnic/EthAdapterPolicies')
-    eth_network_policy = get_policy_ref(intersight, intersight.module.params['eth_network_policy'], '/vnic/EthNetworkPolicies')
-    eth_qos_policy = get_policy_ref(intersight, intersight.module.params['eth_qos_policy'], '/vnic/EthQosPolicies')
-    lan_connectivity_policy = get_policy_ref(intersight, intersight.module.params['lan_connectivity_policy'], '/vnic/LanConnectivityPolicies')
-    mac_pool = get_policy_ref(intersight, intersight.module.params['mac_pool'], '/macpool/Pools')
+    eth_adapter_policy, eth_network_policy, eth_qos_policy, lan_connectivity_policy, mac_pool = get_policy_refs(intersight, [
+        (intersight.module.params['eth_adapter_policy'], '/vnic/EthAdapterPolicies'),
+        (intersight.module.params['eth_network_policy'], '/vnic/EthNetworkPolicies'),
+        (intersight.module.params['eth_qos_policy'], '/vnic/EthQosPolicies'),
+        (intersight.module.params['lan_connectivity_policy'], '/vnic/LanConnectivityPolicies'),
+        (intersight.module.params['mac_pool'], '/macpool/Pools'),
+    ])
 
     #
     # Argument spec above, resource path, and API body should be the only code changed in each policy module
@@ -397,23 +391,30 @@ def main():
     filter_str = "Name eq '" + intersight.module.params['name'] + "'"
     filter_str += "and Parent.Moid eq '" + lan_connectivity_policy['Moid'] + "'"
 
-    intersight.get_resource(
+    intersight.get_state(
         resource_path=resource_path,
-        query_params={
-            '$filter': filter_str,
-        }
+        query_params=add_state_select(
+            {
+                '$filter': filter_str,
+            },
+            intersight.api_body,
+        ),
     )
     vnic_moid = None
     resource_values_match = False
+    patch_keys = None
     if intersight.result['api_response'].get('Moid'):
         # resource exists and moid was returned
         vnic_moid = intersight.result['api_response']['Moid']
         if intersight.module.params['state'] == 'present':
-            resource_values_match = compare_values(intersight.api_body, intersight.result['api_response'])
+            resource_values_match = intersight.compare_resource(intersight.api_body, intersight.result['api_response'])
+            patch_keys = intersight.get_patch_keys(intersight.api_body, intersight.result['api_response'])
     intersight.result['api_response'] = {}
     intersight.result['trace_id'] = ''
     if intersight.module.params['state'] == 'present' and not resource_values_match:
-        intersight.configure_resource(moid=vnic_moid, resource_path=resource_path, body=intersight.api_body, query_params=None)
+        intersight.configure_resource(
+            moid=vnic_moid, resource_path=resource_path, body=intersight.api_body, query_params=None, patch_keys=patch_keys,
+        )
     elif intersight.module.params['state'] == 'absent':
         intersight.delete_resource(moid=vnic_moid, resource_path=resource_path)
         vnic_moid = None
@@ -251,7 +251,7 @@ api_repsonse:
 
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, compare_values
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec, add_state_select
 
 
 def main():
@@ -341,38 +341,33 @@ def main():
             }
         )
 
-    organization_moid = None
     # GET Organization Moid
-    intersight.get_resource(
-        resource_path='/organization/Organizations',
-        query_params={
-            '$filter': "Name eq '" + intersight.module.params['organization'] + "'",
-            '$select': 'Moid',
-        },
-    )
-    if intersight.result['api_response'].get('Moid'):
-        # resource exists and moid was returned
-        organization_moid = intersight.result['api_response']['Moid']
+    organization_moid = intersight.resolve_moid('/organization/Organizations', intersight.module.params['organization'])
 
     intersight.result['api_response'] = {}
     # get the current state of the resource
     filter_str = "Name eq '" + intersight.module.params['name'] + "'"
     filter_str += "and Organization.Moid eq '" + organization_moid + "'"
-    intersight.get_resource(
+    intersight.get_state(
         resource_path=path,
-        query_params={
-            '$filter': filter_str,
-            '$expand': 'Organization',
-        },
+        query_params=add_state_select(
+            {
+                '$filter': filter_str,
+                '$expand': 'Organization',
+            },
+            intersight.api_body,
+        ),
     )
 
     moid = None
     resource_values_match = False
+    patch_keys = None
     if intersight.result['api_response'].get('Moid'):
         # resource exists and moid was returned
         moid = intersight.result['api_response']['Moid']
         if module.params['state'] == 'present':
-            resource_values_match = compare_values(intersight.api_body, intersight.result['api_response'])
+            resource_values_match = intersight.compare_resource(intersight.api_body, intersight.result['api_response'])
+            patch_keys = intersight.get_patch_keys(intersight.api_body, intersight.result['api_response'])
         else:  # state == 'absent'
             intersight.delete_resource(
                 moid=moid,
@@ -395,6 +390,7 @@ def main():
             query_params={
                 '$filter': filter_str,
             },
+            patch_keys=patch_keys,
         )
 
     module.exit_json(**intersight.result)
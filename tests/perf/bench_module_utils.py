@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Microbenchmarks for the Intersight module_utils hot paths.
+
+Times request signing, digests, compare_values on BIOS, boot order and local
+user bodies, JSON encode/decode of 1000 and 10000 server pages (standard
+library and the json_dumps/json_loads codec, which uses orjson when it is
+installed), and the check_and_add_prop body build of intersight_bios_policy.  Results are compared
+with the committed baseline (tests/perf/baseline.json) and --save replaces it.
+
+Usage: python tests/perf/bench_module_utils.py [--filter NAME] [--save] [--max-ratio 1.25]
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import ast
+import copy
+import json
+import os
+import platform
+import sys
+import timeit
+
+try:
+    from ansible_collections.cisco.intersight.plugins.module_utils import intersight
+except ImportError:
+    # running from a git checkout: the playbooks directory links the collection into an ansible_collections tree
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'playbooks', 'collections'))
+    from ansible_collections.cisco.intersight.plugins.module_utils import intersight
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+PERF_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(PERF_DIR, 'baseline.json')
+BIOS_MODULE = os.path.join(PERF_DIR, '..', '..', 'plugins', 'modules', 'intersight_bios_policy.py')
+# each measurement repeats until it takes at least this long
+MIN_TIME = 0.2
+REPEAT = 5
+
+STRING_TO_SIGN = (
+    "(request-target): get /api/v1/ntp/Policies?%24filter=Name+eq+%27lab-ntp%27\n"
+    "host: intersight.com\n"
+    "date: Mon, 01 Jan 2024 00:00:00 GMT\n"
+    "digest: SHA-256=47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU="
+)
+
+
+class BenchModule():
+    """
+    Just enough of AnsibleModule for IntersightModule to be created
+    """
+
+    def __init__(self, private_key):
+        self.params = dict(
+            (name, spec.get('default')) for name, spec in intersight.intersight_argument_spec.items()
+        )
+        self.params.update(api_private_key=private_key, api_key_id='59c84e4a16267c0001c23428/59cc595416267c0001a0dfc7/62b3498c7564612d3198d3c9')
+        self.check_mode = False
+        self._name = 'bench'
+
+    def fail_json(self, **kwargs):
+        raise RuntimeError(kwargs.get('msg'))
+
+
+def server_response(body, object_type):
+    # GET results hold the configured body plus read-only properties and an expanded Organization
+    response = copy.deepcopy(body)
+    response.update(
+        Moid='62b3498c7564612d3198d3c9',
+        ClassId=object_type,
+        ObjectType=object_type,
+        AccountMoid='59c84e4a16267c0001c23428',
+        CreateTime='2024-01-01T00:00:00.000Z',
+        ModTime='2024-01-01T00:00:00.000Z',
+        DomainGroupMoid='5b4e48a96a636d6d346cd1c5',
+        Owners=['59c84e4a16267c0001c23428'],
+        PermissionResources=[],
+        SharedScope='',
+        Parent=None,
+        Profiles=[],
+    )
+    if 'Organization' in response:
+        response['Organization'].update(
+            ClassId='organization.Organization',
+            ObjectType='organization.Organization',
+            Moid='59c84e4a16267c0001c23433',
+            Description='',
+            Resources=[],
+        )
+    return response
+
+
+def bios_properties():
+    # (property, parameter) pairs of every check_and_add_prop call in intersight_bios_policy
+    with open(BIOS_MODULE) as f:
+        tree = ast.parse(f.read())
+    properties = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'check_and_add_prop':
+            properties.append((node.args[0].value, node.args[1].value))
+    return properties
+
+
+def check_and_add_prop(prop, propKey, params, api_body):
+    # copy of intersight_bios_policy.check_and_add_prop (modules can not be imported without running AnsibleModule)
+    if propKey in params.keys():
+        api_body[prop] = params[propKey]
+
+
+def build_bios_body(properties, params):
+    api_body = {
+        'Name': params['name'],
+        'Organization': {
+            'Name': params['organization'],
+        },
+        'Tags': params['tags'],
+        'Description': params['description'],
+    }
+    for prop, key in properties:
+        check_and_add_prop(prop, key, params, api_body)
+    return api_body
+
+
+def boot_order_body():
+    return {
+        'Organization': {'Name': 'default'},
+        'Name': 'COS-Boot',
+        'Tags': [{'Key': 'Site', 'Value': 'SJC02'}],
+        'Description': 'Boot order for COS servers',
+        'ConfiguredBootMode': 'Uefi',
+        'EnforceUefiSecureBoot': False,
+        'BootDevices': [
+            {'ClassId': 'boot.VirtualMedia', 'ObjectType': 'boot.VirtualMedia', 'Enabled': True, 'Name': 'remote-vmedia', 'Subtype': 'cimc-mapped-dvd'},
+            {'ClassId': 'boot.LocalDisk', 'ObjectType': 'boot.LocalDisk', 'Enabled': True, 'Name': 'boot-lun', 'Slot': 'MRAID',
+             'Bootloader': {'ClassId': 'boot.Bootloader', 'ObjectType': 'boot.Bootloader', 'Description': '', 'Name': 'BOOTX64.EFI', 'Path': '\\EFI\\BOOT\\'}},
+            {'ClassId': 'boot.Pxe', 'ObjectType': 'boot.Pxe', 'Enabled': True, 'Name': 'pxe-a', 'IpType': 'IPv4', 'InterfaceSource': 'name',
+             'InterfaceName': 'eth0', 'Port': -1, 'MacAddress': '', 'Slot': 'MLOM'},
+            {'ClassId': 'boot.Pxe', 'ObjectType': 'boot.Pxe', 'Enabled': True, 'Name': 'pxe-b', 'IpType': 'IPv4', 'InterfaceSource': 'name',
+             'InterfaceName': 'eth1', 'Port': -1, 'MacAddress': '', 'Slot': 'MLOM'},
+            {'ClassId': 'boot.Iscsi', 'ObjectType': 'boot.Iscsi', 'Enabled': False, 'Name': 'iscsi', 'Slot': 'MLOM', 'Port': 0},
+            {'ClassId': 'boot.Usb', 'ObjectType': 'boot.Usb', 'Enabled': True, 'Name': 'usb', 'Subtype': 'usb-cd'},
+        ],
+    }
+
+
+def local_users_body(users=10):
+    return {
+        'Name': 'guest-admin',
+        'Tags': [{'Key': 'Site', 'Value': 'SJC02'}],
+        'Description': 'Local users',
+        'PasswordProperties': {
+            'EnforceStrongPassword': True,
+            'EnablePasswordExpiry': False,
+            'PasswordHistory': 5,
+        },
+        'EndPointUserRoles': [
+            {
+                'Enabled': True,
+                'EndPointRole': [{'Name': 'admin' if i % 2 else 'readonly', 'Type': 'IMC'}],
+                'EndPointUser': {'Name': 'user%02d' % i},
+            } for i in range(users)
+        ],
+        'Organization': {'Name': 'default'},
+    }
+
+
+def local_users_response(body):
+    response = server_response(body, 'iam.EndPointUserPolicy')
+    for index, role in enumerate(response['EndPointUserRoles']):
+        # expanded EndPointUserRoles($expand=EndPointRole,EndPointUser)
+        role.update(ClassId='iam.EndPointUserRole', ObjectType='iam.EndPointUserRole', Moid='62b3498c7564612d3198%04x' % index,
+                    Password='', IsPasswordSet=True, ChangePassword=False)
+        role['EndPointRole'][0].update(ClassId='iam.EndPointRole', ObjectType='iam.EndPointRole', Privileges=['all'], RoleType='endpoint-admin')
+        role['EndPointUser'].update(ClassId='iam.EndPointUser', ObjectType='iam.EndPointUser', Moid='62b3498c7564612d3199%04x' % index)
+    return response
+
+
+def server_page(servers=1000):
+    return {
+        'ObjectType': 'compute.PhysicalSummary.List',
+        'Results': [
+            server_response({
+                'Name': 'server-%05d' % i,
+                'Serial': 'FCH%08d' % i,
+                'Model': 'UCSC-C240-M5SX',
+                'SourceObjectType': 'compute.RackUnit',
+                'OperPowerState': 'on',
+                'Firmware': '4.1(3c)',
+                'NumCpus': 2,
+                'NumCpuCores': 56,
+                'TotalMemory': 786432,
+                'ManagementMode': 'IntersightStandalone',
+                'MgmtIpAddress': '10.0.%d.%d' % (i // 256, i % 256),
+                'AlarmSummary': {'ClassId': 'compute.AlarmSummary', 'Critical': 0, 'Warning': 1, 'Health': 'Warning'},
+                'Tags': [{'Key': 'Site', 'Value': 'SJC02'}],
+            }, 'compute.PhysicalSummary') for i in range(servers)
+        ],
+    }
+
+
+def benchmarks():
+    """
+    :return: list of (name, zero argument callable) pairs
+    """
+    pem = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend()).private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+    module = intersight.IntersightModule(BenchModule(pem))
+    module.get_sig_b64encode(STRING_TO_SIGN)
+    request_signer = module.get_request_signer()
+    auth_header = {
+        'Host': 'intersight.com',
+        'Date': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        'Digest': 'SHA-256=47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU=',
+    }
+    body_string = json.dumps(boot_order_body())
+
+    properties = bios_properties()
+    bios_params = dict((key, 'platform-default') for dummy, key in properties)
+    bios_params.update(name='bios-policy', organization='default', tags=None, description=None)
+    bios_body = build_bios_body(properties, bios_params)
+    bios_actual = server_response(bios_body, 'bios.Policy')
+    boot_body = boot_order_body()
+    boot_actual = server_response(boot_body, 'boot.PrecisionPolicy')
+    users_body = local_users_body()
+    users_actual = local_users_response(users_body)
+
+    page = server_page()
+    page_json = json.dumps(page)
+    large_page = server_page(10000)
+    large_page_json = json.dumps(large_page).encode()
+
+    return [
+        ('get_sig_b64encode rsa-2048', lambda: module.get_sig_b64encode(STRING_TO_SIGN)),
+        ('RequestSigner.headers rsa-2048', lambda: request_signer.headers('patch /api/v1/boot/PrecisionPolicies', body_string.encode())),
+        ('prepare_str_to_sign', lambda: intersight.prepare_str_to_sign('get /api/v1/ntp/Policies', auth_header)),
+        ('get_sha256_digest boot body', lambda: intersight.get_sha256_digest(body_string)),
+        ('compare_values bios policy', lambda: intersight.compare_values(bios_body, bios_actual)),
+        ('compare_values boot order', lambda: intersight.compare_values(boot_body, boot_actual)),
+        ('compare_values local users', lambda: intersight.compare_values(users_body, users_actual)),
+        ('json encode 1000 servers', lambda: json.dumps(page)),
+        ('json decode 1000 servers', lambda: json.loads(page_json)),
+        ('json_dumps encode 1000 servers', lambda: intersight.json_dumps(page)),
+        ('json_loads decode 1000 servers', lambda: intersight.json_loads(page_json)),
+        ('json encode 10000 servers', lambda: json.dumps(large_page)),
+        ('json decode 10000 servers', lambda: json.loads(large_page_json)),
+        ('json_dumps encode 10000 servers', lambda: intersight.json_dumps(large_page)),
+        ('json_loads decode 10000 servers', lambda: intersight.json_loads(large_page_json)),
+        ('bios check_and_add_prop body', lambda: build_bios_body(properties, bios_params)),
+    ]
+
+
+def measure(func):
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    while elapsed < MIN_TIME:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this string')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline results file')
+    parser.add_argument('--save', action='store_true', help='write the results to the baseline file')
+    parser.add_argument('--max-ratio', type=float, default=0,
+                        help='exit with status 1 when a benchmark is this many times slower than the baseline')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    regressions = []
+    print('{0:<36} {1:>14} {2:>14} {3:>8}'.format('benchmark', 'us/op', 'baseline us/op', 'ratio'))
+    for name, func in benchmarks():
+        if args.filter not in name:
+            continue
+        seconds = measure(func)
+        results[name] = round(seconds * 1e6, 3)
+        ratio = ''
+        if name in baseline:
+            ratio = results[name] / baseline[name]
+            if args.max_ratio and ratio > args.max_ratio:
+                regressions.append(name)
+            ratio = '{0:.2f}x'.format(ratio)
+        print('{0:<36} {1:>14.3f} {2:>14} {3:>8}'.format(name, results[name], baseline.get(name, '-'), ratio))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(dict(
+                python=platform.python_version(),
+                machine=platform.machine(),
+                processor=platform.processor(),
+                results=dict(baseline, **results),
+            ), f, indent=2, sort_keys=True)
+            f.write('\n')
+    if regressions:
+        print('slower than %sx the baseline: %s' % (args.max_ratio, ', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Per-request signing cost of the Intersight module_utils.
+
+Compares loading the PEM private key on every request (the behavior before
+PrivateKeySigner) with the cached signer used by IntersightModule, then the
+full header pipeline (URL parsing, digest, string to sign, Authorization
+header) built per request against the RequestSigner templates, in signed
+requests per second.
+
+Usage: python tests/perf/bench_signing.py [--number N]
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import os
+import sys
+import timeit
+from base64 import b64encode
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+
+try:
+    from ansible_collections.cisco.intersight.plugins.module_utils import intersight
+except ImportError:
+    # running from a git checkout: the playbooks directory links the collection into an ansible_collections tree
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'playbooks', 'collections'))
+    from ansible_collections.cisco.intersight.plugins.module_utils import intersight
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+
+API_URI = 'https://intersight.com/api/v1'
+KEY_ID = '59c84e4a16267c0001c23428/59cc595416267c0001a0dfc7/62b3498c7564612d3198d3c9'
+RESOURCE_PATH = '/ntp/Policies'
+QUERY_PATH = '?%24filter=Name+eq+%27lab-ntp%27'
+BODY = b'{"Name": "lab-ntp", "Enabled": true, "NtpServers": ["ntp.esl.cisco.com"]}'
+STRING_TO_SIGN = (
+    "(request-target): get /api/v1/ntp/Policies?%24filter=Name+eq+%27lab-ntp%27\n"
+    "host: intersight.com\n"
+    "date: Mon, 01 Jan 2024 00:00:00 GMT\n"
+    "digest: SHA-256=47DEQpj8HBSa+/TImW+5JCeuQeRkm5NMpJWZG3hSuFU="
+)
+
+
+def generate_keys():
+    traditional = dict(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    ec_key = ec.generate_private_key(ec.SECP256R1(), default_backend())
+    return {
+        'rsa-2048': rsa_key.private_bytes(**traditional).decode(),
+        'ec-p256': ec_key.private_bytes(**traditional).decode(),
+    }
+
+
+def sign_uncached(private_key, data):
+    # mirrors the previous get_sig_b64encode: parse and classify the key on every call
+    m = intersight.PEM_PRE_BOUNDARY.match(private_key)
+    key = serialization.load_pem_private_key(private_key.encode(), None, default_backend())
+    if m.group(1) == 'RSA PRIVATE KEY':
+        sign = key.sign(data.encode(), padding.PKCS1v15(), hashes.SHA256())
+    else:
+        sign = key.sign(data.encode(), ec.ECDSA(hashes.SHA256()))
+    return b64encode(sign)
+
+
+def headers_per_request(signer, data):
+    # mirrors the previous intersight_call: parse api_uri twice and concatenate every header from scratch
+    target_host = urlparse(API_URI).netloc
+    target_path = urlparse(API_URI).path
+    request_target = 'patch ' + target_path + RESOURCE_PATH + QUERY_PATH
+    cdate = intersight.get_gmt_date()
+    b64_body_digest = b64encode(intersight.hashlib.sha256(data).digest())
+    auth_header = {
+        'Host': target_host,
+        'Date': cdate,
+        'Digest': "SHA-256=" + b64_body_digest.decode('ascii'),
+    }
+    string_to_sign = intersight.prepare_str_to_sign(request_target, auth_header)
+    signed_msg = signer.sign(string_to_sign)
+    auth_str = "Signature" + " " + "keyId=\"" + KEY_ID + "\"," + "algorithm=\"" + signer.algorithm + "\","
+    auth_str = auth_str + "headers=\"(request-target)"
+    for key in auth_header:
+        auth_str = auth_str + " " + key.lower()
+    auth_str = auth_str + "\"" + "," + "signature=\"" + signed_msg.decode('ascii') + "\""
+    return {
+        'Host': target_host,
+        'Date': cdate,
+        'Digest': auth_header['Digest'],
+        'Authorization': auth_str,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='signatures per measurement')
+    args = parser.parse_args()
+
+    print('{0:<10} {1:>16} {2:>16} {3:>9}'.format('key', 'uncached us/req', 'cached us/req', 'speedup'))
+    for name, private_key in generate_keys().items():
+        signer = intersight.PrivateKeySigner(private_key)
+        uncached = min(timeit.repeat(lambda: sign_uncached(private_key, STRING_TO_SIGN), number=args.number, repeat=3))
+        cached = min(timeit.repeat(lambda: signer.sign(STRING_TO_SIGN), number=args.number, repeat=3))
+        print('{0:<10} {1:>16.1f} {2:>16.1f} {3:>8.1f}x'.format(
+            name, uncached / args.number * 1e6, cached / args.number * 1e6, uncached / cached))
+
+    print('')
+    print('{0:<10} {1:>16} {2:>16} {3:>9}'.format('key', 'per-call req/s', 'template req/s', 'speedup'))
+    for name, private_key in generate_keys().items():
+        signer = intersight.PrivateKeySigner(private_key)
+        request_signer = intersight.RequestSigner(KEY_ID, signer, urlparse(API_URI).netloc)
+        request_target = 'patch ' + urlparse(API_URI).path + RESOURCE_PATH + QUERY_PATH
+        per_call = min(timeit.repeat(lambda: headers_per_request(signer, BODY), number=args.number, repeat=3))
+        template = min(timeit.repeat(lambda: request_signer.headers(request_target, BODY), number=args.number, repeat=3))
+        print('{0:<10} {1:>16.0f} {2:>16.0f} {3:>8.2f}x'.format(
+            name, args.number / per_call, args.number / template, per_call / template))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,654 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Local Intersight API stand-in for offline performance testing.
+
+Serves in-memory managed object collections under /api/v1 with the subset of the
+Intersight query language used by the collection ($filter, $select, $top, $skip,
+$expand, $count), verifies the HTTP signature on every request, and can inject
+latency, 429 throttling, server errors and page size limits.
+
+Request counters are served without authentication at /standin/stats.
+
+Usage: python tests/perf/intersight_standin.py --key-id <id> --private-key <pem> [--port 8443]
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import random
+import re
+import socket
+import ssl
+import threading
+import time
+import zlib
+from base64 import b64decode, b64encode
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qsl, urlsplit
+except ImportError:
+    raise SystemExit('the Intersight stand-in requires Python 3.7 or newer')
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+
+API_PREFIX = '/api/v1'
+STATS_PATH = '/standin/stats'
+# bulk.Request ActionOnError enum
+BULK_ACTIONS_ON_ERROR = ('Stop', 'Proceed')
+# reverse relationships kept up to date on writes:
+# object type -> {reference property: list property of the referenced object}
+INVERSE_RELATIONS = {
+    'iam.EndPointUserRole': {'EndPointUserPolicy': 'EndPointUserRoles'},
+    'vnic.EthIf': {'LanConnectivityPolicy': 'EthIfs'},
+    'vnic.FcIf': {'SanConnectivityPolicy': 'FcIfs'},
+}
+AUTH_PARAMS = re.compile(r'(\w+)="([^"]*)"')
+TOKENS = re.compile(r"\s*(?:('(?:[^']|'')*')|(-?\d+(?:\.\d+)?)\b|([A-Za-z_][\w./]*)|(\(|\)|,|:))")
+COMPARISONS = {
+    'eq': lambda a, b: a == b,
+    'ne': lambda a, b: a != b,
+    'gt': lambda a, b: a is not None and a > b,
+    'ge': lambda a, b: a is not None and a >= b,
+    'lt': lambda a, b: a is not None and a < b,
+    'le': lambda a, b: a is not None and a <= b,
+}
+
+
+class QueryError(Exception):
+    pass
+
+
+def new_moid():
+    return '%024x' % random.getrandbits(96)
+
+
+def mod_time():
+    now = time.time()
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + '.%06dZ' % (now % 1 * 1e6)
+
+
+def object_type(resource_path):
+    # /ntp/Policies -> ntp.Policy, /compute/PhysicalSummaries -> compute.PhysicalSummary
+    package, collection = resource_path.strip('/').split('/')[:2]
+    if collection.endswith('ies'):
+        collection = collection[:-3] + 'y'
+    elif collection.endswith('s'):
+        collection = collection[:-1]
+    return package + '.' + collection
+
+
+def lookup(obj, path):
+    for part in re.split(r'[./]', path):
+        if isinstance(obj, dict):
+            obj = obj.get(part)
+        else:
+            return None
+    return obj
+
+
+class FilterParser():
+    """
+    Recursive descent parser for the $filter subset used by the modules.
+
+    Supports eq/ne/gt/ge/lt/le, in (...), contains(), startswith(), any() lambdas,
+    not, and/or with parentheses. Returns a predicate taking a managed object.
+    """
+
+    def __init__(self, text):
+        self.tokens = []
+        pos = 0
+        text = text.strip()
+        while pos < len(text):
+            m = TOKENS.match(text, pos)
+            if not m or m.end() == pos:
+                raise QueryError('Invalid $filter near: %s' % text[pos:])
+            pos = m.end()
+            string, number, name, punct = m.groups()
+            if string is not None:
+                self.tokens.append(('value', string[1:-1].replace("''", "'")))
+            elif number is not None:
+                self.tokens.append(('value', float(number) if '.' in number else int(number)))
+            elif name is not None:
+                if name in ('true', 'false', 'null'):
+                    self.tokens.append(('value', {'true': True, 'false': False, 'null': None}[name]))
+                else:
+                    self.tokens.append(('name', name))
+            else:
+                self.tokens.append(('punct', punct))
+            if pos < len(text) and text[pos:].strip() == '':
+                break
+        self.pos = 0
+
+    def peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return False
+        tok_kind, tok_value = self.tokens[self.pos]
+        return (kind is None or tok_kind == kind) and (value is None or tok_value == value)
+
+    def take(self, kind=None, value=None):
+        if not self.peek(kind, value):
+            raise QueryError('Unexpected token in $filter: %s' % (self.tokens[self.pos:self.pos + 1],))
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def parse(self):
+        if not self.tokens:
+            return lambda obj: True
+        predicate = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise QueryError('Trailing tokens in $filter: %s' % (self.tokens[self.pos:],))
+        return predicate
+
+    def parse_or(self):
+        terms = [self.parse_and()]
+        while self.peek('name', 'or'):
+            self.take()
+            terms.append(self.parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda obj: any(term(obj) for term in terms)
+
+    def parse_and(self):
+        terms = [self.parse_not()]
+        while self.peek('name', 'and'):
+            self.take()
+            terms.append(self.parse_not())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda obj: all(term(obj) for term in terms)
+
+    def parse_not(self):
+        if self.peek('name', 'not'):
+            self.take()
+            term = self.parse_not()
+            return lambda obj: not term(obj)
+        return self.parse_term()
+
+    def parse_term(self):
+        if self.peek('punct', '('):
+            self.take()
+            term = self.parse_or()
+            self.take('punct', ')')
+            return term
+        name = self.take('name')
+        if name in ('contains', 'startswith', 'endswith') and self.peek('punct', '('):
+            self.take()
+            field = self.take('name')
+            self.take('punct', ',')
+            value = self.take('value')
+            self.take('punct', ')')
+            test = {'contains': lambda a: value in a, 'startswith': lambda a: a.startswith(value), 'endswith': lambda a: a.endswith(value)}[name]
+            return lambda obj: isinstance(lookup(obj, field), str) and test(lookup(obj, field))
+        if name.endswith('/any') or name.endswith('/all'):
+            field, quantifier = name.rsplit('/', 1)
+            self.take('punct', '(')
+            variable = self.take('name')
+            self.take('punct', ':')
+            inner = self.parse_or_prefixed(variable)
+            self.take('punct', ')')
+            reducer = any if quantifier == 'any' else all
+            return lambda obj: reducer(inner(item) for item in (lookup(obj, field) or []))
+        op = self.take('name')
+        if op == 'in':
+            self.take('punct', '(')
+            values = [self.take('value')]
+            while self.peek('punct', ','):
+                self.take()
+                values.append(self.take('value'))
+            self.take('punct', ')')
+            values = set(values)
+            return lambda obj: lookup(obj, name) in values
+        if op not in COMPARISONS:
+            raise QueryError('Unsupported $filter operator: %s' % op)
+        value = self.take('value')
+        compare = COMPARISONS[op]
+        return lambda obj: compare(lookup(obj, name), value)
+
+    def parse_or_prefixed(self, prefix):
+        # lambda bodies refer to the range variable (t/Moid); strip the prefix while parsing
+        saved = self.tokens
+        self.tokens = [(kind, value[len(prefix) + 1:] if kind == 'name' and value.startswith(prefix + '/') else value) for kind, value in saved]
+        try:
+            return self.parse_or()
+        finally:
+            self.tokens = saved
+
+
+def split_top_level(text):
+    """Split 'A($expand=B,C),D' into ['A($expand=B,C)', 'D']"""
+    parts, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def parse_expand(text):
+    """Return {field: nested_query_dict} for an $expand value"""
+    expand = {}
+    for part in split_top_level(text or ''):
+        nested = {}
+        m = re.match(r'^([\w.]+)\((.*)\)$', part)
+        if m:
+            part = m.group(1)
+            for option in m.group(2).split(';'):
+                if '=' in option:
+                    key, value = option.split('=', 1)
+                    nested[key.strip()] = value.strip()
+        expand[part] = nested
+    return expand
+
+
+class MoStore():
+    """
+    In-memory managed object collections keyed by resource path, e.g. '/ntp/Policies'
+    """
+
+    def __init__(self):
+        self.collections = {}
+        self.by_moid = {}
+        self.lock = threading.RLock()
+
+    def add(self, resource_path, obj):
+        with self.lock:
+            obj = dict(obj)
+            obj.setdefault('Moid', new_moid())
+            obj.setdefault('ObjectType', object_type(resource_path))
+            obj.setdefault('ClassId', obj['ObjectType'])
+            obj.setdefault('CreateTime', mod_time())
+            obj.setdefault('ModTime', obj['CreateTime'])
+            self.collections.setdefault(resource_path, []).append(obj)
+            self.by_moid[obj['Moid']] = obj
+            return obj
+
+    def seed(self, servers=1000, policies=50, organizations=('default',)):
+        """Populate the collections the modules use with realistic objects"""
+        orgs = [self.add('/organization/Organizations', {'Name': name}) for name in organizations]
+        org_ref = {'ObjectType': 'organization.Organization', 'Moid': orgs[0]['Moid']}
+        for role in ('admin', 'readonly', 'user'):
+            self.add('/iam/EndPointRoles', {'Name': role, 'Type': 'IMC', 'Privileges': ['all'] if role == 'admin' else []})
+        for i in range(servers):
+            self.add('/compute/PhysicalSummaries', {
+                'Name': 'server-%05d' % i,
+                'Serial': 'FCH%08d' % i,
+                'Model': 'UCSC-C240-M5SX',
+                'SourceObjectType': 'compute.RackUnit',
+                'OperPowerState': 'on',
+                'Firmware': '4.1(3c)',
+                'NumCpus': 2,
+                'TotalMemory': 786432,
+                'ManagementMode': 'Intersight' if i % 2 else 'IntersightStandalone',
+            })
+        for i in range(policies):
+            self.add('/ntp/Policies', {
+                'Name': 'ntp-%03d' % i,
+                'Organization': org_ref,
+                'Enabled': True,
+                'NtpServers': ['ntp1.example.com', 'ntp2.example.com'],
+                'Timezone': 'America/Los_Angeles',
+                'Description': '',
+                'Tags': [],
+                'Profiles': [],
+            })
+            self.add('/server/Profiles', {
+                'Name': 'profile-%03d' % i,
+                'Organization': org_ref,
+                'TargetPlatform': 'Standalone',
+                'Description': '',
+                'Tags': [],
+            })
+
+    def get(self, moid):
+        return self.by_moid.get(moid)
+
+    def query(self, resource_path, params, max_top):
+        with self.lock:
+            items = self.collections.get(resource_path, [])
+            predicate = FilterParser(params.get('$filter', '')).parse()
+            matched = [obj for obj in items if predicate(obj)]
+        if params.get('$count', '').lower() == 'true':
+            return {'ObjectType': 'mo.DocumentCount', 'Count': len(matched)}
+        skip = int(params.get('$skip', 0))
+        top = int(params.get('$top', 100))
+        if max_top:
+            top = min(top, max_top)
+        page = matched[skip:skip + top]
+        return {
+            'ObjectType': object_type(resource_path) + '.List',
+            'Results': [self.render(obj, params) for obj in page] or None,
+        }
+
+    def render(self, obj, params):
+        obj = copy.deepcopy(obj)
+        for field, nested in parse_expand(params.get('$expand')).items():
+            value = obj.get(field)
+            if isinstance(value, dict) and value.get('Moid'):
+                target = self.get(value['Moid'])
+                if target:
+                    obj[field] = self.render(target, nested)
+            elif isinstance(value, list):
+                obj[field] = [self.render(self.get(ref['Moid']), nested) if isinstance(ref, dict) and self.get(ref.get('Moid')) else ref for ref in value]
+        select = params.get('$select')
+        if select:
+            keep = set(split_top_level(select)) | {'Moid', 'ObjectType', 'ClassId'}
+            obj = dict((key, value) for key, value in obj.items() if key in keep)
+        return obj
+
+    def create(self, resource_path, body):
+        with self.lock:
+            body = dict(body or {})
+            for key, value in list(body.items()):
+                if isinstance(value, dict) and set(value) <= {'Moid', 'ObjectType', 'ClassId'} and value.get('Moid'):
+                    target = self.get(value['Moid'])
+                    body[key] = {'Moid': value['Moid'], 'ObjectType': target['ObjectType'] if target else value.get('ObjectType')}
+            obj = self.add(resource_path, body)
+            self.link(obj)
+            return obj
+
+    def update(self, moid, body):
+        with self.lock:
+            obj = self.get(moid)
+            if obj is None:
+                return None
+            self.unlink(obj)
+            obj.update(body or {})
+            obj['ModTime'] = mod_time()
+            self.link(obj)
+            return obj
+
+    def delete(self, resource_path, moid):
+        with self.lock:
+            obj = self.by_moid.pop(moid, None)
+            if obj is not None:
+                collection = self.collections.get(resource_path, [])
+                collection[:] = [item for item in collection if item['Moid'] != moid]
+                self.unlink(obj)
+            return obj
+
+    def inverse_targets(self, obj):
+        # (referenced object, list property) for each INVERSE_RELATIONS reference of obj
+        for field, inverse in INVERSE_RELATIONS.get(obj.get('ObjectType'), {}).items():
+            ref = obj.get(field)
+            target = self.get(ref.get('Moid')) if isinstance(ref, dict) else None
+            if target is not None:
+                yield target, inverse
+
+    def link(self, obj):
+        """Add obj to the reverse relationship lists of the objects it references"""
+        for target, inverse in self.inverse_targets(obj):
+            target.setdefault(inverse, []).append({'Moid': obj['Moid'], 'ObjectType': obj['ObjectType']})
+            target['ModTime'] = mod_time()
+
+    def unlink(self, obj):
+        """Remove obj from the reverse relationship lists of the objects it references"""
+        for target, inverse in self.inverse_targets(obj):
+            target[inverse] = [ref for ref in target.get(inverse, []) if ref.get('Moid') != obj['Moid']]
+            target['ModTime'] = mod_time()
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, keys, store=None, latency=0.0, latency_jitter=0.0, throttle_rate=0.0,
+                 error_rate=0.0, max_top=1000, retry_after=1, verify_signatures=True):
+        ThreadingHTTPServer.__init__(self, address, StandinHandler)
+        self.keys = dict((key_id, load_public_key(pem)) for key_id, pem in keys.items())
+        self.store = store or MoStore()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.max_top = max_top
+        self.retry_after = retry_after
+        self.verify_signatures = verify_signatures
+        self.stats = {'requests': 0, 'throttled': 0, 'errors': 0, 'connections': 0, 'bytes_sent': 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] += amount
+
+
+def load_public_key(pem):
+    if isinstance(pem, str):
+        pem = pem.encode()
+    if b'PRIVATE KEY' in pem:
+        return serialization.load_pem_private_key(pem, None, default_backend()).public_key()
+    return serialization.load_pem_public_key(pem, default_backend())
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # headers and body are written separately, avoid Nagle/delayed-ACK stalls on keep-alive connections
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_api()
+
+    def do_POST(self):
+        self.handle_api()
+
+    def do_PATCH(self):
+        self.handle_api()
+
+    def do_DELETE(self):
+        self.handle_api()
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode() if payload is not None else b''
+        accept = self.headers.get('Accept-Encoding', '')
+        encoding = None
+        if data and 'gzip' in accept:
+            data, encoding = gzip.compress(data), 'gzip'
+        elif data and 'deflate' in accept:
+            data, encoding = zlib.compress(data), 'deflate'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('x-starship-traceid', 'standin-%08x' % random.getrandbits(32))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count('bytes_sent', len(data))
+
+    def verify(self, body):
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('Signature '):
+            return 'missing Signature authorization'
+        params = dict(AUTH_PARAMS.findall(auth))
+        public_key = self.server.keys.get(params.get('keyId'))
+        if public_key is None:
+            return 'unknown keyId'
+        digest = 'SHA-256=' + b64encode(hashlib.sha256(body).digest()).decode('ascii')
+        if self.headers.get('Digest') != digest:
+            return 'body digest mismatch'
+        lines = []
+        for name in params.get('headers', '').split():
+            if name == '(request-target)':
+                lines.append('(request-target): %s %s' % (self.command.lower(), self.path))
+            else:
+                lines.append('%s: %s' % (name, self.headers.get(name, '')))
+        message = '\n'.join(lines).encode()
+        try:
+            signature = b64decode(params.get('signature', ''))
+            if isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(signature, message, padding.PKCS1v15(), hashes.SHA256())
+            else:
+                public_key.verify(signature, message, ec.ECDSA(hashes.SHA256()))
+        except (InvalidSignature, ValueError):
+            return 'invalid signature'
+        return None
+
+    def handle_api(self):
+        server = self.server
+        if self.path == STATS_PATH:
+            with server.stats_lock:
+                stats = dict(server.stats)
+            return self.send_json(200, stats)
+        server.count('requests')
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        body = self.rfile.read(length) if length else b''
+        if server.latency or server.latency_jitter:
+            time.sleep(server.latency + random.uniform(0, server.latency_jitter))
+        if server.verify_signatures:
+            error = self.verify(body)
+            if error:
+                return self.send_json(401, {'code': 'Unauthorized', 'message': error})
+        if server.throttle_rate and random.random() < server.throttle_rate:
+            server.count('throttled')
+            return self.send_json(429, {'code': 'TooManyRequests', 'message': 'rate limit exceeded'}, {'Retry-After': str(server.retry_after)})
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('errors')
+            return self.send_json(503, {'code': 'ServiceUnavailable', 'message': 'injected error'})
+        url = urlsplit(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return self.send_json(404, {'code': 'NotFound', 'message': url.path})
+        parts = url.path[len(API_PREFIX):].strip('/').split('/')
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return self.send_json(400, {'code': 'BadRequest', 'message': 'invalid JSON body'})
+        try:
+            if parts[:2] == ['bulk', 'Requests'] and self.command == 'POST':
+                return self.send_json(200, self.bulk(payload))
+            status, response = self.dispatch(self.command, parts, params, payload)
+        except QueryError as e:
+            return self.send_json(400, {'code': 'InvalidRequest', 'message': str(e)})
+        self.send_json(status, response)
+
+    def dispatch(self, method, parts, params, payload):
+        store = self.server.store
+        resource_path = '/' + '/'.join(parts[:2])
+        if len(parts) == 2:
+            if method == 'GET':
+                return 200, store.query(resource_path, params, self.server.max_top)
+            if method == 'POST':
+                if isinstance(payload, list):
+                    return 200, {'Results': [store.create(resource_path, item) for item in payload]}
+                return 200, store.create(resource_path, payload)
+        elif len(parts) == 3:
+            moid = parts[2]
+            if store.get(moid) is None:
+                return 404, {'code': 'NotFound', 'message': 'no such object %s' % moid}
+            if method == 'GET':
+                return 200, store.render(store.get(moid), params)
+            if method in ('PATCH', 'POST'):
+                return 200, store.update(moid, payload)
+            if method == 'DELETE':
+                store.delete(resource_path, moid)
+                return 200, None
+        elif len(parts) >= 4:
+            # relationship collections, e.g. /ntp/Policies/{moid}/Profiles[/{profile moid}]
+            obj = store.get(parts[2])
+            if obj is None:
+                return 404, {'code': 'NotFound', 'message': 'no such object %s' % parts[2]}
+            with store.lock:
+                refs = obj.setdefault(parts[3], [])
+                if method == 'POST':
+                    refs.extend(dict(Moid=ref['Moid'], ObjectType=ref.get('ObjectType')) for ref in payload or [])
+                    return 200, None
+                if method == 'DELETE' and len(parts) == 5:
+                    refs[:] = [ref for ref in refs if ref.get('Moid') != parts[4]]
+                    return 200, None
+                if method == 'GET':
+                    return 200, {'Results': refs or None}
+        return 405, {'code': 'MethodNotAllowed', 'message': method}
+
+    def bulk(self, payload):
+        results = []
+        default_verb = payload.get('Verb', 'POST')
+        default_uri = payload.get('Uri', '')
+        action_on_error = payload.get('ActionOnError', 'Stop')
+        if action_on_error not in BULK_ACTIONS_ON_ERROR:
+            raise QueryError('ActionOnError must be one of %s, not %r' % (', '.join(BULK_ACTIONS_ON_ERROR), action_on_error))
+        stop = action_on_error == 'Stop'
+        failed = False
+        for request in payload.get('Requests', []):
+            if failed and stop:
+                results.append({'ObjectType': 'bulk.RestResult', 'Status': 424, 'Body': {'message': 'skipped'}})
+                continue
+            verb = request.get('Verb') or default_verb
+            uri = request.get('Uri') or default_uri
+            parts = uri.split('?')[0].strip('/').split('/')
+            if parts and re.match(r'^v\d+$', parts[0]):
+                parts = parts[1:]
+            if request.get('TargetMoid'):
+                parts.append(request['TargetMoid'])
+            try:
+                status, body = self.dispatch(verb, parts, {}, request.get('Body'))
+            except QueryError as e:
+                status, body = 400, {'message': str(e)}
+            failed = failed or status >= 400
+            results.append({'ObjectType': 'bulk.RestResult', 'Status': status, 'Body': body})
+        return {'ObjectType': 'bulk.Request', 'Moid': new_moid(), 'Status': 'Completed', 'Results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--key-id', required=True, help='api_key_id the modules will sign with')
+    parser.add_argument('--private-key', required=True, help='PEM private (or public) key file used to verify signatures')
+    parser.add_argument('--certfile', help='serve HTTPS with this PEM certificate (and key) file')
+    parser.add_argument('--servers', type=int, default=1000, help='number of /compute/PhysicalSummaries to seed')
+    parser.add_argument('--policies', type=int, default=50, help='number of /ntp/Policies and /server/Profiles to seed')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='random extra latency up to this many seconds')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--max-top', type=int, default=1000, help='largest page the server will return')
+    args = parser.parse_args()
+
+    with open(args.private_key) as f:
+        keys = {args.key_id: f.read()}
+    server = StandinServer(
+        (args.host, args.port), keys, latency=args.latency, latency_jitter=args.latency_jitter,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, max_top=args.max_top,
+    )
+    server.store.seed(servers=args.servers, policies=args.policies)
+    scheme = 'http'
+    if args.certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(args.certfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    print('Intersight stand-in listening on %s://%s:%s%s' % (scheme, args.host, args.port, API_PREFIX))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
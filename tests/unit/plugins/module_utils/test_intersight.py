@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+# Tests of the IntersightModule request handling against the local Intersight stand-in server
+# (tests/perf/intersight_standin.py)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import random
+import stat
+import threading
+import time
+
+import pytest
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ansible_collections.cisco.intersight.plugins.module_utils import intersight as intersight_utils
+from ansible_collections.cisco.intersight.plugins.module_utils.intersight import IntersightModule, intersight_argument_spec
+from ansible_collections.cisco.intersight.tests.perf import intersight_standin
+from ansible_collections.cisco.intersight.tests.perf.intersight_standin import StandinServer
+
+KEY_ID = '1234/5678/9abc'
+
+
+class FailJson(Exception):
+    pass
+
+
+class FakeModule():
+    """
+    AnsibleModule stand-in with the intersight_argument_spec defaults
+    """
+
+    def __init__(self, **params):
+        self.params = dict((name, spec.get('default')) for name, spec in intersight_argument_spec.items())
+        self.params.update(params)
+        self.check_mode = False
+        self._diff = False
+
+    def fail_json(self, **kwargs):
+        raise FailJson(kwargs['msg'])
+
+
+class ScriptedRandom():
+    """
+    random module for the stand-in whose random() returns the scripted values first, e.g. to
+    throttle exactly the first requests
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def random(self):
+        if self.values:
+            return self.values.pop(0)
+        return 1.0
+
+    def __getattr__(self, name):
+        return getattr(random, name)
+
+
+@pytest.fixture(scope='module')
+def private_key(tmp_path_factory):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption())
+    path = tmp_path_factory.mktemp('key') / 'SecretKey.txt'
+    path.write_bytes(pem)
+    return str(path)
+
+
+@pytest.fixture
+def standin(private_key):
+    with open(private_key) as f:
+        server = StandinServer(('127.0.0.1', 0), {KEY_ID: f.read()})
+    server.store.seed(servers=2500, policies=20)
+    thread = threading.Thread(target=server.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_intersight(standin, private_key, tmp_path):
+    def make(**params):
+        module_params = dict(
+            api_uri='http://127.0.0.1:%d/api/v1' % standin.server_address[1],
+            api_key_id=KEY_ID,
+            api_private_key=private_key,
+            use_proxy=False,
+            state_dir=str(tmp_path / 'state'),
+            retries=0,
+        )
+        module_params.update(params)
+        return IntersightModule(FakeModule(**module_params))
+    return make
+
+
+def server_requests(server):
+    with server.stats_lock:
+        return server.stats['requests']
+
+
+@pytest.mark.parametrize('params', [
+    dict(),
+    dict(page_size=2000),
+    dict(page_size=700, adaptive_concurrency=True),
+])
+def test_results_past_the_first_page(make_intersight, params):
+    intersight = make_intersight(**params)
+    names = [item['Name'] for item in intersight.iter_results('/compute/PhysicalSummaries', {'$select': 'Name'})]
+    assert names == ['server-%05d' % i for i in range(2500)]
+
+
+def test_more_than_1000_pages(make_intersight, standin):
+    intersight = make_intersight(page_size=2)
+    requests = server_requests(standin)
+    pages = list(intersight.iter_pages('/compute/PhysicalSummaries', {'$select': 'Name'}))
+    # the last full page is followed by an empty one
+    assert len(pages) == 1251
+    assert server_requests(standin) - requests == 1251
+    assert sum(len(page['Results'] or []) for page in pages) == 2500
+
+
+def test_top_limits_paged_results(make_intersight):
+    intersight = make_intersight(page_size=1000)
+    results = list(intersight.iter_results('/compute/PhysicalSummaries', {'$top': 1500, '$skip': 10}))
+    assert len(results) == 1500
+    assert results[0]['Name'] == 'server-00010'
+
+
+def test_throttled_requests_wait_for_retry_after(make_intersight, standin, monkeypatch):
+    standin.throttle_rate = 0.5
+    standin.retry_after = 0.2
+    monkeypatch.setattr(intersight_standin, 'random', ScriptedRandom([0.0, 0.0]))
+    intersight = make_intersight(retries=3)
+    start = time.time()
+    response = intersight.call_api(http_method='get', resource_path='/ntp/Policies', query_params={'$top': 1})
+    assert response['Results'][0]['Name'] == 'ntp-000'
+    assert time.time() - start >= 0.4
+    assert intersight.result['api_retries'] == dict(count=2, wait_time=pytest.approx(0.4))
+    assert standin.stats['throttled'] == 2
+
+
+def test_throttled_requests_stop_after_retries(make_intersight, standin):
+    standin.throttle_rate = 1.0
+    standin.retry_after = 0
+    intersight = make_intersight(retries=2)
+    with pytest.raises(FailJson, match='429'):
+        intersight.call_api(http_method='get', resource_path='/ntp/Policies')
+    assert standin.stats['throttled'] == 3
+
+
+@pytest.mark.parametrize('action_on_error, created', [('Stop', 200), ('Proceed', 249)])
+def test_bulk_chunks(make_intersight, standin, action_on_error, created):
+    intersight = make_intersight(api_stats=True)
+    operations = [
+        dict(http_method='post', resource_path='/ntp/Policies', body={'Name': 'bulk-%03d' % i}) for i in range(250)
+    ]
+    # fails in the middle of the second chunk
+    operations[150] = dict(http_method='patch', resource_path='/ntp/Policies', moid='0' * 24, body={'Enabled': False})
+    results = intersight.bulk_call(operations, action_on_error=action_on_error)
+    assert [call['resource_path'] for call in intersight.result['api_stats']['requests']] == ['/bulk/Requests'] * 3
+    assert len(results) == 250
+    assert results[150]['status'] == 404 and results[150]['error']
+    if action_on_error == 'Stop':
+        assert all(result['status'] == 424 for result in results[151:200])
+    assert sum(1 for result in results if result['error'] is None) == created
+    names = set(policy['Name'] for policy in standin.store.collections['/ntp/Policies'])
+    assert len([name for name in names if name.startswith('bulk-')]) == created
+
+
+def test_bulk_chunks_concurrently(make_intersight, standin):
+    intersight = make_intersight(adaptive_concurrency=True)
+    operations = [
+        dict(http_method='post', resource_path='/ntp/Policies', body={'Name': 'bulk-%03d' % i}) for i in range(250)
+    ]
+    results = intersight.bulk_call(operations)
+    assert [result['body']['Name'] for result in results] == ['bulk-%03d' % i for i in range(250)]
+
+
+def test_shared_gets(make_intersight, standin):
+    intersight = make_intersight(max_concurrency=8)
+    options = dict(http_method='get', resource_path='/ntp/Policies', query_params={'$filter': "Name eq 'ntp-001'"})
+    requests = server_requests(standin)
+    results = intersight.call_many([options] * 8)
+    assert server_requests(standin) - requests == 1
+    assert [result['response']['Results'][0]['Name'] for result in results] == ['ntp-001'] * 8
+    # every caller gets its own copy
+    results[0]['response']['Results'][0]['Name'] = 'changed'
+    assert intersight.call_api(**options)['Results'][0]['Name'] == 'ntp-001'
+    assert server_requests(standin) - requests == 1
+
+
+def test_shared_gets_are_dropped_by_writes(make_intersight, standin):
+    intersight = make_intersight()
+    policy_options = dict(http_method='get', resource_path='/iam/EndPointUserPolicies', query_params={'$expand': 'EndPointUserRoles'})
+    organization = intersight.resolve_moid('/organization/Organizations', 'default')
+    policy = intersight.call_api(http_method='post', resource_path='/iam/EndPointUserPolicies', body={
+        'Name': 'users', 'Organization': {'Moid': organization},
+    })
+    assert not intersight.call_api(**policy_options)['Results'][0].get('EndPointUserRoles')
+    requests = server_requests(standin)
+    assert not intersight.call_api(**policy_options)['Results'][0].get('EndPointUserRoles')
+    assert server_requests(standin) == requests
+    # a write to another collection changes the expanded policy
+    intersight.call_api(http_method='post', resource_path='/iam/EndPointUserRoles', body={
+        'EndPointUserPolicy': {'Moid': policy['Moid'], 'ObjectType': 'iam.EndPointUserPolicy'},
+    })
+    assert len(intersight.call_api(**policy_options)['Results'][0]['EndPointUserRoles']) == 1
+    assert server_requests(standin) == requests + 2
+
+
+def test_circuit_breaker_opens_and_half_opens(make_intersight, standin):
+    standin.error_rate = 1.0
+    intersight = make_intersight(circuit_breaker_threshold=2, circuit_breaker_cooldown=0.5)
+    options = dict(http_method='get', resource_path='/ntp/Policies', query_params={'$top': 1})
+    for dummy in range(2):
+        with pytest.raises(FailJson, match='503'):
+            intersight.call_api(**options)
+    assert standin.stats['errors'] == 2
+    # open: no request is sent
+    with pytest.raises(FailJson, match='Circuit breaker open'):
+        intersight.call_api(**options)
+    assert standin.stats['errors'] == 2
+    # shared by other modules using the same api_uri
+    with pytest.raises(FailJson, match='Circuit breaker open'):
+        make_intersight(circuit_breaker_threshold=2, circuit_breaker_cooldown=0.5).call_api(**options)
+    time.sleep(0.6)
+    # half-open: a failed probe opens the circuit again
+    with pytest.raises(FailJson, match='503'):
+        intersight.call_api(**options)
+    assert standin.stats['errors'] == 3
+    with pytest.raises(FailJson, match='Circuit breaker open'):
+        intersight.call_api(**options)
+    time.sleep(0.6)
+    # a successful probe closes it
+    standin.error_rate = 0.0
+    assert intersight.call_api(**options)['Results']
+    assert intersight.call_api(http_method='get', resource_path='/ntp/Policies', query_params={'$top': 2})['Results']
+
+
+@pytest.mark.parametrize('params', [
+    dict(rate_limit=100),
+    dict(circuit_breaker_threshold=3),
+    dict(hedge_percentile=90),
+    dict(state_cache=True),
+    dict(moid_cache_ttl=60),
+    dict(response_cache=True, response_cache_ttl={'/ntp/Policies': 60}),
+])
+def test_missing_state_dir_is_created(make_intersight, tmp_path, params):
+    state_dir = tmp_path / 'missing' / 'state'
+    intersight = make_intersight(state_dir=str(state_dir), **params)
+    intersight.get_state('/ntp/Policies', {'$filter': "Name eq 'ntp-002'"})
+    assert intersight.result['api_response']['Name'] == 'ntp-002'
+    assert intersight.resolve_moid('/ntp/Policies', 'ntp-002') == intersight.result['api_response']['Moid']
+    assert stat.S_IMODE(os.stat(str(state_dir)).st_mode) == 0o700
+
+
+@pytest.mark.parametrize('params', [
+    dict(rate_limit=100),
+    dict(circuit_breaker_threshold=3),
+    dict(hedge_percentile=90),
+    dict(moid_cache_ttl=60),
+])
+def test_unsafe_state_dir_fails(make_intersight, tmp_path, params):
+    state_dir = tmp_path / 'shared'
+    state_dir.mkdir()
+    state_dir.chmod(0o755)
+    with pytest.raises(FailJson, match='Unable to use the state_dir'):
+        make_intersight(state_dir=str(state_dir), **params)
+
+
+def test_state_dir_that_is_a_file_fails(make_intersight, tmp_path):
+    state_dir = tmp_path / 'file'
+    state_dir.write_text(u'')
+    with pytest.raises(FailJson, match='Unable to use the state_dir'):
+        make_intersight(state_dir=str(state_dir), rate_limit=100)
+
+
+def test_state_cache_without_a_usable_state_dir(make_intersight, standin, tmp_path):
+    state_dir = tmp_path / 'shared'
+    state_dir.mkdir()
+    state_dir.chmod(0o755)
+    for dummy in range(2):
+        intersight = make_intersight(state_dir=str(state_dir), state_cache=True)
+        requests = server_requests(standin)
+        intersight.get_state('/ntp/Policies', {'$filter': "Name eq 'ntp-003'"})
+        assert intersight.result['api_response']['Name'] == 'ntp-003'
+        # ModTime check and full GET every time
+        assert server_requests(standin) - requests == 2
+
+
+def test_state_cache_removes_expired_files(make_intersight, standin, tmp_path):
+    state_dir = tmp_path / 'state'
+    intersight = make_intersight(state_cache=True)
+    intersight.get_state('/ntp/Policies', {'$filter': "Name eq 'ntp-004'"})
+    expired = state_dir / 'intersight-state-0000000000000000.json'
+    expired.write_text(u'{}')
+    old = time.time() - intersight_utils.STATE_CACHE_MAX_AGE - 1
+    os.utime(str(expired), (old, old))
+    intersight = make_intersight(state_cache=True)
+    requests = server_requests(standin)
+    intersight.get_state('/ntp/Policies', {'$filter': "Name eq 'ntp-004'"})
+    assert intersight.result['api_response']['Name'] == 'ntp-004'
+    # only the ModTime check, the object was cached by the first module
+    assert server_requests(standin) - requests == 1
+    assert not expired.exists()
+
+
+def test_moid_cache_state_file_errors_are_misses(make_intersight, standin, tmp_path):
+    intersight = make_intersight(moid_cache_ttl=60)
+    # a directory where the state file should be cannot be opened
+    os.mkdir(intersight.moid_cache.path)
+    moid = intersight.resolve_moid('/ntp/Policies', 'ntp-005')
+    assert moid is not None
+    requests = server_requests(standin)
+    assert intersight.resolve_moid('/ntp/Policies', 'ntp-005') == moid
+    assert server_requests(standin) == requests
+
+
+def test_hedger_without_a_usable_state_file(tmp_path):
+    hedger = intersight_utils.RequestHedger(90, 0.1, str(tmp_path / 'missing' / 'hedge.json'))
+    assert hedger.get_delay() is None
+    assert hedger.take() is False
+    hedger.add_latency(0.01)
+    assert hedger.latencies == [0.01]